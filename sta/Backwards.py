@@ -1,21 +1,125 @@
-import math
 import networkx as nx
-from typing import Dict, Iterable, Hashable, List, Optional
+import numpy as np
+from typing import Dict, Iterable, Hashable, List, Optional, Tuple, Union
 
 try:
+    from ._jit import HAVE_NUMBA, njit, prange
+    from .graph_csr import build_csr, edge_delays, plan_level_sweep, topo_levels, topo_node_ids
     from .Khan import Khan_topological_sort
 except ImportError:
+    from _jit import HAVE_NUMBA, njit, prange
+    from graph_csr import build_csr, edge_delays, plan_level_sweep, topo_levels, topo_node_ids
     from Khan import Khan_topological_sort
 
+@njit(parallel=True, cache=True, boundscheck=False)
+def _backward_levels_csr(indptr, indices, delays, level_nodes, level_starts, RT):
+    """
+    Level-parallel RT sweep over a CSR graph. Updates RT in place.
+
+    Levels are visited from the sinks back to the sources. The fanouts of a
+    level lie in higher (finished) levels and every node only writes its own
+    RT, so the nodes of a level are relaxed in parallel without locks.
+    """
+    for lvl in range(level_starts.size - 2, -1, -1):
+        for i in prange(level_starts[lvl], level_starts[lvl + 1]):
+            u = level_nodes[i]
+            acc = RT[u]
+            for e in range(indptr[u], indptr[u + 1]):
+                cand = RT[indices[e]] - delays[e]
+                if cand < acc:
+                    acc = cand
+            RT[u] = acc
+
+
+@njit(cache=True, boundscheck=False)
+def _backward_csr(indptr, indices, delays, topo, RT):
+    """Sequential RT sweep in reverse topological order. Updates RT in place."""
+    for idx in range(topo.size - 1, -1, -1):
+        u = topo[idx]
+        acc = RT[u]
+        for e in range(indptr[u], indptr[u + 1]):
+            cand = RT[indices[e]] - delays[e]
+            if cand < acc:
+                acc = cand
+        RT[u] = acc
+
+
+@njit(cache=True, boundscheck=False)
+def _backward_slack_csr(indptr, indices, delays, topo, RT, AT, node_slack, edge_slack):
+    """
+    `_backward_csr` fused with the slack computation. Updates RT, node_slack
+    and edge_slack in place.
+
+    When u is visited the RT of its fanouts is final, so the slack of every
+    fanout edge, RT[v] - AT[u] - d(u,v), is written in the same loop that
+    relaxes RT[u], and the node slack RT[u] - AT[u] as soon as RT[u] is final.
+    """
+    for idx in range(topo.size - 1, -1, -1):
+        u = topo[idx]
+        acc = RT[u]
+        au = AT[u]
+        for e in range(indptr[u], indptr[u + 1]):
+            rv = RT[indices[e]]
+            cand = rv - delays[e]
+            edge_slack[e] = rv - au - delays[e]
+            if cand < acc:
+                acc = cand
+        RT[u] = acc
+        node_slack[u] = acc - au
+
+
+def _backward_levels_numpy(indptr, indices, delays, level, RT):
+    """
+    RT sweep without Numba, one vectorized relaxation per topological level.
+    Updates RT in place.
+    """
+    # Group the edges by the topological level of their source. The fanouts
+    # of a level lie in higher levels only, so sweeping the levels from the
+    # sinks back to the sources, each level is one vectorized relaxation
+    # RT[u] = min(RT[u], RT[v] - d(u,v)) over all of its edges.
+    src = np.repeat(np.arange(RT.size, dtype=np.int32), np.diff(indptr))
+    edge_level = level[src]
+    by_level = np.argsort(edge_level, kind="stable")
+    src, dst, delays = src[by_level], indices[by_level], delays[by_level]
+    num_levels = int(level.max()) + 1 if RT.size else 0
+    level_starts = np.searchsorted(edge_level[by_level], np.arange(num_levels + 1))
+
+    for lvl in range(num_levels - 1, -1, -1):
+        s, e = level_starts[lvl], level_starts[lvl + 1]
+        if s < e:
+            np.minimum.at(RT, src[s:e], RT[dst[s:e]] - delays[s:e])
+
+
+def _seed_required_times(node_list, node_index, endpoints, Tclk, setup, endpoint_overrides):
+    """RT array initialized to +inf (least constraining) with the endpoints seeded."""
+    RT_arr = np.full(len(node_list), np.inf, dtype=np.float64)
+
+    # Seed endpoints with default RT
+    for e in endpoints:
+        if e in node_index:
+            RT_arr[node_index[e]] = Tclk - setup
+
+    # Apply any explicit overrides (e.g., I/O constraints)
+    if endpoint_overrides:
+        for e, val in endpoint_overrides.items():
+            if e in node_index:
+                RT_arr[node_index[e]] = float(val)
+    return RT_arr
+
+
 def backward_required_times(
     G: nx.DiGraph,
-    topo_order: List[Hashable],
+    topo_order: Union[List[Hashable], np.ndarray],
     endpoints: Iterable[Hashable],
     Tclk: float,
     setup: float = 0.05,
     endpoint_overrides: Optional[Dict[Hashable, float]] = None,
     delay_attr: str = "delay",
-) -> Dict[Hashable, float]:
+    csr=None,
+    parallel: Optional[bool] = None,
+    as_array: bool = False,
+    delays: Optional[np.ndarray] = None,
+) -> Union[Dict[Hashable, float], np.ndarray]:
     """
     Compute required times (RT) on a DAG timing graph.
 
@@ -23,40 +127,49 @@ def backward_required_times(
 
     Args:
         G: nx.DiGraph where each edge (u,v) has a `delay_attr` (seconds).
-        topo_order: topological order of G (sources→sinks).
+        topo_order: topological order of G (sources→sinks), as labels or as
+                    an int array of CSR node IDs.
         endpoints: nodes to seed as timing endpoints (e.g., FF D pins).
         Tclk: clock period (seconds).
         setup: setup time (seconds). Endpoint seeds default to Tclk - setup.
         endpoint_overrides: optional dict {endpoint: RT_value} to override seeds.
         delay_attr: edge attribute name carrying arc delay.
+        csr: optional prebuilt `build_csr(G)` tuple to reuse.
+        parallel: relax the nodes of each topological level in parallel
+                  (Numba threads). None picks it automatically for graphs
+                  with wide levels; results are identical either way.
+        as_array: return the float64 RT array indexed by the CSR node IDs
+                  (`build_csr(G)` node order) instead of a dict, for callers
+                  that keep working on arrays.
+        delays: optional prebuilt `edge_delays(G, node_list, delay_attr)`
+                array aligned with the CSR, so G's edge data is not read.
 
     Returns:
-        RT: dict mapping node -> required time (seconds).
+        RT: dict mapping node -> required time (seconds), or the RT array
+            if as_array is set.
     """
-    # Initialize all nodes with +inf (least constraining)
-    RT: Dict[Hashable, float] = {n: math.inf for n in G.nodes()}
-
-    # Seed endpoints with default RT
-    for e in endpoints:
-        if e in RT:
-            RT[e] = Tclk - setup
+    node_list, indptr, indices, node_index = csr if csr is not None else build_csr(G)
+    if delays is None:
+        delays = edge_delays(G, node_list, delay_attr)
 
-    # Apply any explicit overrides (e.g., I/O constraints)
-    if endpoint_overrides:
-        for e, val in endpoint_overrides.items():
-            if e in RT:
-                RT[e] = float(val)
+    RT_arr = _seed_required_times(node_list, node_index, endpoints, Tclk, setup, endpoint_overrides)
 
-    # Backward sweep in reverse topological order
-    for u in reversed(topo_order):
-        # For each fanout (u->v), tighten RT[u]
-        for _, v, data in G.out_edges(u, data=True):
-            d = float(data.get(delay_attr, 0.0))
-            cand = RT[v] - d
-            if cand < RT[u]:
-                RT[u] = cand
+    # Backward sweep in reverse topological order. min is exact, so the
+    # level-parallel and the vectorized sweeps give the same RT.
+    topo = topo_node_ids(topo_order, node_index)
+    parallel, level, level_nodes, level_starts = plan_level_sweep(indptr, indices, topo, parallel)
+    if parallel:
+        _backward_levels_csr(indptr, indices, delays, level_nodes, level_starts, RT_arr)
+    elif HAVE_NUMBA:
+        _backward_csr(indptr, indices, delays, topo, RT_arr)
+    else:
+        if level is None:
+            level = topo_levels(indptr, indices, topo)
+        _backward_levels_numpy(indptr, indices, delays, level, RT_arr)
 
-    return RT
+    if as_array:
+        return RT_arr
+    return dict(zip(node_list, RT_arr.tolist()))
 
 
 def backward_required_times_autotopo(
@@ -72,7 +185,69 @@ def backward_required_times_autotopo(
     
     See backward_required_times() for parameter descriptions.
     """
-    topo = Khan_topological_sort(G)
+    csr = build_csr(G)
+    topo = Khan_topological_sort(G, csr=csr, as_array=True)
     return backward_required_times(
-        G, topo, endpoints, Tclk, setup, endpoint_overrides, delay_attr
+        G, topo, endpoints, Tclk, setup, endpoint_overrides, delay_attr, csr=csr
     )
+
+
+def backward_required_times_and_slacks(
+    G: nx.DiGraph,
+    topo_order: Union[List[Hashable], np.ndarray],
+    endpoints: Iterable[Hashable],
+    Tclk: float,
+    AT: np.ndarray,
+    setup: float = 0.05,
+    endpoint_overrides: Optional[Dict[Hashable, float]] = None,
+    delay_attr: str = "delay",
+    csr=None,
+    parallel: Optional[bool] = None,
+    delays: Optional[np.ndarray] = None,
+) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Required times together with node and edge slacks, in one backward pass.
+
+    The sequential sweep writes the slacks of every node and fanout edge as
+    soon as its RT is final, so no separate pass over the graph (nor the
+    label-keyed AT/RT dicts) is needed for the slacks. The values equal
+    backward_required_times() followed by compute_slacks().
+
+    Args:
+        AT: float64 arrival time array indexed by the CSR node IDs, e.g. from
+            forward_arrival_times(..., as_array=True)
+        See backward_required_times() for the other parameters.
+
+    Returns:
+        RT: float64 array of required times, indexed by node ID
+        node_slack: float64 array RT - AT, indexed by node ID
+        edge_slack: float64 array RT[v] - AT[u] - d(u,v), aligned with the
+                    CSR `indices` (edge IDs)
+    """
+    node_list, indptr, indices, node_index = csr if csr is not None else build_csr(G)
+    if delays is None:
+        delays = edge_delays(G, node_list, delay_attr)
+    AT = np.asarray(AT, dtype=np.float64)
+
+    RT_arr = _seed_required_times(node_list, node_index, endpoints, Tclk, setup, endpoint_overrides)
+
+    topo = topo_node_ids(topo_order, node_index)
+    parallel, level, level_nodes, level_starts = plan_level_sweep(indptr, indices, topo, parallel)
+    if not parallel and HAVE_NUMBA:
+        node_slack = np.empty_like(RT_arr)
+        edge_slack = np.empty(indices.size, dtype=np.float64)
+        _backward_slack_csr(indptr, indices, delays, topo, RT_arr, AT, node_slack, edge_slack)
+        return RT_arr, node_slack, edge_slack
+
+    # The level-parallel and vectorized sweeps relax whole levels at once,
+    # so the slacks follow as two vectorized expressions over the final RT
+    if parallel:
+        _backward_levels_csr(indptr, indices, delays, level_nodes, level_starts, RT_arr)
+    else:
+        if level is None:
+            level = topo_levels(indptr, indices, topo)
+        _backward_levels_numpy(indptr, indices, delays, level, RT_arr)
+    src = np.repeat(np.arange(len(node_list), dtype=np.int32), np.diff(indptr))
+    node_slack = RT_arr - AT
+    edge_slack = RT_arr[indices] - AT[src] - delays
+    return RT_arr, node_slack, edge_slack
@@ -1,21 +1,223 @@
-import math
 import networkx as nx
-from typing import Dict, Iterable, Hashable, List, Optional, Tuple
+import numpy as np
+from typing import Dict, Iterable, Hashable, List, Optional, Tuple, Union
 
 try:
-    from .Khan import Khan_topological_sort
+    from ._jit import njit, prange
+    from .graph_csr import build_csr, edge_delays, fanin_csr, plan_level_sweep, topo_node_ids
+    from .Khan import _count_indegrees
 except ImportError:
-    from Khan import Khan_topological_sort
+    from _jit import njit, prange
+    from graph_csr import build_csr, edge_delays, fanin_csr, plan_level_sweep, topo_node_ids
+    from Khan import _count_indegrees
+
+
+@njit(cache=True, boundscheck=False)
+def _forward_csr(indptr, indices, delays, topo, AT, eps):
+    """
+    Late-mode AT sweep over a CSR graph. Updates AT in place.
+
+    Back-predecessors are recorded as linked lists of edge IDs: bp_head[v] is
+    the first edge realizing AT[v] (-1 if none) and bp_next[e] the next tied
+    edge. The lists keep the order in which edges were relaxed, matching the
+    dict-based bookkeeping.
+    """
+    bp_head = np.full(AT.size, -1, dtype=np.int32)
+    bp_tail = np.full(AT.size, -1, dtype=np.int32)
+    bp_next = np.full(indices.size, -1, dtype=np.int32)
+
+    for idx in range(topo.size):
+        _relax_fanout(topo[idx], indptr, indices, delays, AT, eps, bp_head, bp_tail, bp_next)
+
+    return bp_head, bp_next
+
+
+@njit(cache=True, boundscheck=False)
+def _relax_fanout(u, indptr, indices, delays, AT, eps, bp_head, bp_tail, bp_next):
+    """Relax the fanout edges of node u (see _forward_csr)."""
+    au = AT[u]
+    if au == -np.inf:
+        # unreachable; skip pushing to fanouts
+        return
+    for e in range(indptr[u], indptr[u + 1]):
+        v = indices[e]
+        cand = au + delays[e]
+        if cand > AT[v] + eps:
+            AT[v] = cand
+            bp_head[v] = e
+            bp_tail[v] = e
+            bp_next[e] = -1
+        elif abs(cand - AT[v]) <= eps:
+            # Tie: keep all predecessors that realize the max (for path enumeration)
+            if bp_tail[v] == -1:
+                bp_head[v] = e
+            else:
+                bp_next[bp_tail[v]] = e
+            bp_tail[v] = e
+
+
+@njit(parallel=True, cache=True, boundscheck=False)
+def _forward_levels_csr(rev_indptr, rev_edges, rev_src, delays, level_nodes, level_starts, AT, eps):
+    """
+    Level-parallel variant of `_forward_csr`. Updates AT in place.
+
+    Each node of a level pulls over its fan-in, whose drivers all lie in lower
+    (finished) levels, and only writes its own AT, back-predecessor head and
+    the bp_next entries of its own fan-in edges, so the nodes of a level run
+    in parallel without locks. The fan-in is sorted by the drivers' topo
+    position, so the comparisons (and ties) happen in the same order as in
+    the push sweep and the results are identical.
+    """
+    bp_head = np.full(AT.size, -1, dtype=np.int32)
+    bp_next = np.full(rev_edges.size, -1, dtype=np.int32)
+
+    # Level 0 holds the sources, which have no fan-in
+    for lvl in range(1, level_starts.size - 1):
+        for i in prange(level_starts[lvl], level_starts[lvl + 1]):
+            v = level_nodes[i]
+            av = AT[v]
+            head = -1
+            tail = -1
+            for k in range(rev_indptr[v], rev_indptr[v + 1]):
+                au = AT[rev_src[k]]
+                if au == -np.inf:
+                    # unreachable driver
+                    continue
+                e = rev_edges[k]
+                cand = au + delays[e]
+                if cand > av + eps:
+                    av = cand
+                    head = e
+                    tail = e
+                    bp_next[e] = -1
+                elif abs(cand - av) <= eps:
+                    # Tie: keep all predecessors that realize the max
+                    if tail == -1:
+                        head = e
+                    else:
+                        bp_next[tail] = e
+                    tail = e
+            AT[v] = av
+            bp_head[v] = head
+
+    return bp_head, bp_next
+
+
+@njit(cache=True, boundscheck=False)
+def _kahn_forward_csr(indptr, indices, delays, AT, eps):
+    """
+    Kahn's algorithm fused with the AT sweep: every node's fanout is relaxed
+    as soon as it is popped, so the topological order is never materialized
+    before the sweep. Pops happen in Kahn order, hence AT and back-predecessors
+    are identical to `_kahn_csr` followed by `_forward_csr`.
+
+    Returns:
+        Tuple of (count, bp_head, bp_next); count < n means the graph
+        contains a cycle.
+    """
+    n = indptr.size - 1
+    indeg = _count_indegrees(indices, n)
+    bp_head = np.full(n, -1, dtype=np.int32)
+    bp_tail = np.full(n, -1, dtype=np.int32)
+    bp_next = np.full(indices.size, -1, dtype=np.int32)
+
+    queue = np.empty(n, dtype=np.int32)
+    head = 0
+    tail = 0
+    for u in range(n):
+        if indeg[u] == 0:
+            queue[tail] = u
+            tail += 1
+
+    while head < tail:
+        u = queue[head]
+        head += 1
+        _relax_fanout(u, indptr, indices, delays, AT, eps, bp_head, bp_tail, bp_next)
+        for i in range(indptr[u], indptr[u + 1]):
+            v = indices[i]
+            indeg[v] -= 1
+            if indeg[v] == 0:
+                queue[tail] = v
+                tail += 1
+
+    return head, bp_head, bp_next
+
+
+def _seed_arrival_times(node_list, node_index, startpoints, clock_to_q, startpoint_overrides,
+                        AT_dtype=np.float64):
+    """AT array initialized to -inf (unreached) with the startpoints seeded."""
+    AT_arr = np.full(len(node_list), -np.inf, dtype=AT_dtype)
+    for s in startpoints:
+        if s in node_index:
+            AT_arr[node_index[s]] = clock_to_q
+    if startpoint_overrides:
+        for s, val in startpoint_overrides.items():
+            if s in node_index:
+                AT_arr[node_index[s]] = float(val)
+    return AT_arr
+
+
+def _arrival_dicts(node_list, indptr, AT_arr, bp_head, bp_next, as_array=False):
+    """
+    Back to label-keyed AT and backpred dicts at the API boundary (AT stays
+    an array if as_array is set).
+    """
+    AT = AT_arr if as_array else dict(zip(node_list, AT_arr.tolist()))
+    src = np.repeat(np.arange(len(node_list), dtype=np.int32), np.diff(indptr)).tolist()
+    bp_next_list = bp_next.tolist()
+    backpred: Dict[Hashable, List[Hashable]] = {}
+    for n, e in zip(node_list, bp_head.tolist()):
+        preds = []
+        while e != -1:
+            preds.append(node_list[src[e]])
+            e = bp_next_list[e]
+        backpred[n] = preds
+    return AT, backpred
+
+
+def _forward_sweep(csr, delays, topo_order, startpoints, clock_to_q, startpoint_overrides,
+                   eps, AT_dtype=np.float64, parallel=None):
+    """
+    The AT sweep of forward_arrival_times on CSR arrays only.
+
+    Returns:
+        Tuple of (AT_arr, bp_head, bp_next) over the CSR node/edge IDs, with
+        the back-predecessor linked lists of `_forward_csr`
+    """
+    node_list, indptr, indices, node_index = csr
+    delays = delays.astype(AT_dtype, copy=False)
+    AT_arr = _seed_arrival_times(
+        node_list, node_index, startpoints, clock_to_q, startpoint_overrides, AT_dtype
+    )
+
+    # Forward sweep along topo order
+    topo = topo_node_ids(topo_order, node_index)
+    parallel, _, level_nodes, level_starts = plan_level_sweep(indptr, indices, topo, parallel)
+    if parallel:
+        topo_pos = np.empty(len(node_list), dtype=np.int32)
+        topo_pos[topo] = np.arange(topo.size, dtype=np.int32)
+        rev_indptr, rev_edges, rev_src = fanin_csr(indptr, indices, topo_pos)
+        bp_head, bp_next = _forward_levels_csr(
+            rev_indptr, rev_edges, rev_src, delays, level_nodes, level_starts, AT_arr, eps
+        )
+    else:
+        bp_head, bp_next = _forward_csr(indptr, indices, delays, topo, AT_arr, eps)
+    return AT_arr, bp_head, bp_next
 
 def forward_arrival_times(
     G: nx.DiGraph,
-    topo_order: List[Hashable],
+    topo_order: Union[List[Hashable], np.ndarray],
     startpoints: Iterable[Hashable],
     clock_to_q: float = 0.0,
     startpoint_overrides: Optional[Dict[Hashable, float]] = None,
     delay_attr: str = "delay",
     eps: float = 1e-12,
-) -> Tuple[Dict[Hashable, float], Dict[Hashable, List[Hashable]]]:
+    AT_dtype=np.float64,
+    csr=None,
+    parallel: Optional[bool] = None,
+    delays: Optional[np.ndarray] = None,
+    as_array: bool = False,
+) -> Tuple[Union[Dict[Hashable, float], np.ndarray], Dict[Hashable, List[Hashable]]]:
     """
     Late-mode arrival time (AT) propagation on a DAG timing graph.
 
@@ -24,48 +226,41 @@ def forward_arrival_times(
 
     Args:
         G: nx.DiGraph where each edge (u,v) has a `delay_attr` (seconds).
-        topo_order: topological order of G (sources -> sinks).
+        topo_order: topological order of G (sources -> sinks), as labels or
+                    as an int array of CSR node IDs.
         startpoints: nodes to seed as timing startpoints (e.g., FF Q pins).
         clock_to_q: default seed value for all startpoints (seconds).
         startpoint_overrides: optional dict {startpoint: AT_value} to override seeds.
         delay_attr: edge attribute name carrying arc delay.
         eps: tolerance for tie-handling when recording back-predecessors.
+        AT_dtype: floating dtype of the AT/delay arrays. np.float32 halves
+                  their memory traffic, but its ~7 significant digits round AT
+                  to ~1e-7 * AT, far above the default eps: arcs that tie in
+                  float64 may no longer tie (and vice versa), changing
+                  backpred and therefore the extracted paths.
+        csr: optional prebuilt `build_csr(G)` tuple to reuse.
+        parallel: relax the nodes of each topological level in parallel
+                  (Numba threads). None picks it automatically for graphs
+                  with wide levels; results are identical either way.
+        delays: optional prebuilt `edge_delays(G, node_list, delay_attr)`
+                array aligned with the CSR, so G's edge data is not read.
+        as_array: return AT as the array indexed by the CSR node IDs
+                  (`build_csr(G)` node order) instead of a dict.
 
     Returns:
-        AT: dict(node -> arrival time in seconds)
+        AT: dict(node -> arrival time in seconds), or the AT array if
+            as_array is set
         backpred: dict(node -> list of predecessors that achieve AT[node])
                   (used for critical path back-tracing)
     """
-    # Initialize AT to -inf (unreached)
-    AT: Dict[Hashable, float] = {n: -math.inf for n in G.nodes()}
-    backpred: Dict[Hashable, List[Hashable]] = {n: [] for n in G.nodes()}
-
-    # Seed startpoints
-    for s in startpoints:
-        if s in AT:
-            AT[s] = clock_to_q
-    if startpoint_overrides:
-        for s, val in startpoint_overrides.items():
-            if s in AT:
-                AT[s] = float(val)
-
-    # Forward sweep along topo order
-    for u in topo_order:
-        au = AT[u]
-        if au == -math.inf:
-            # unreachable; skip pushing to fanouts
-            continue
-        for _, v, data in G.out_edges(u, data=True):
-            d = float(data.get(delay_attr, 0.0))
-            cand = au + d
-            if cand > AT[v] + eps:
-                AT[v] = cand
-                backpred[v] = [u]
-            elif abs(cand - AT[v]) <= eps:
-                # Tie: keep all predecessors that realize the max (for path enumeration)
-                backpred[v].append(u)
-
-    return AT, backpred
+    csr = csr if csr is not None else build_csr(G)
+    if delays is None:
+        delays = edge_delays(G, csr[0], delay_attr)
+    AT_arr, bp_head, bp_next = _forward_sweep(
+        csr, delays, topo_order, startpoints, clock_to_q, startpoint_overrides, eps, AT_dtype,
+        parallel,
+    )
+    return _arrival_dicts(csr[0], csr[1], AT_arr, bp_head, bp_next, as_array)
 
 
 def forward_arrival_times_autotopo(
@@ -75,19 +270,34 @@ def forward_arrival_times_autotopo(
     startpoint_overrides: Optional[Dict[Hashable, float]] = None,
     delay_attr: str = "delay",
     eps: float = 1e-12,
+    AT_dtype=np.float64,
+    csr=None,
+    delays: Optional[np.ndarray] = None,
 ) -> Tuple[Dict[Hashable, float], Dict[Hashable, List[Hashable]]]:
     """
     Convenience wrapper that computes topological order internally.
-    
+
+    Khan's algorithm and the AT sweep run as a single fused pass over the CSR
+    graph; the result equals forward_arrival_times() on Khan's order.
     See forward_arrival_times() for parameter descriptions.
+
+    Raises:
+        TypeError: If graph is not directed
+        nx.NetworkXUnfeasible: If graph contains cycles
     """
-    topo = Khan_topological_sort(G)
-    return forward_arrival_times(
-        G,
-        topo,
-        startpoints,
-        clock_to_q=clock_to_q,
-        startpoint_overrides=startpoint_overrides,
-        delay_attr=delay_attr,
-        eps=eps,
+    if not G.is_directed():
+        raise TypeError("Graph must be a directed graph (DiGraph).")
+
+    node_list, indptr, indices, node_index = csr if csr is not None else build_csr(G)
+    if delays is None:
+        delays = edge_delays(G, node_list, delay_attr)
+    delays = delays.astype(AT_dtype, copy=False)
+    AT_arr = _seed_arrival_times(
+        node_list, node_index, startpoints, clock_to_q, startpoint_overrides, AT_dtype
     )
+
+    count, bp_head, bp_next = _kahn_forward_csr(indptr, indices, delays, AT_arr, eps)
+    if count != len(node_list):
+        raise nx.NetworkXUnfeasible("Graph contains a cycle; topological sort not possible.")
+
+    return _arrival_dicts(node_list, indptr, AT_arr, bp_head, bp_next)
@@ -1,3 +1,4 @@
+import mmap
 import re
 import networkx as nx
 
@@ -16,6 +17,64 @@ GATE_DELAY = {
     "MUX2_OR": 0.08,
 }
 
+# Every gate type detect_gate_type can return
+GATE_TYPES = ("ASSIGN", "NOT", "AND", "OR", "XOR", "NAND", "NOR")
+
+# Patterns are compiled once at import and shared by every parse.
+
+# Horizontal whitespace: statements are matched line by line, so no part of a
+# statement pattern may run into the next line
+_WS = r'[^\S\n]'
+
+# One scan over the whole source classifies every relevant statement line and
+# captures its fields; the kind is the name of the matched alternative
+# (match.lastgroup). Everything else (declarations, comments, blank lines)
+# is skipped by the scan. Alternatives are tried in the order the parser used
+# to test the line: always-block header, "end*" line, MUX2 instance,
+# continuous assignment, procedural assignment.
+# The scan (like the other patterns here) is anchored and has no nested
+# quantifiers, so the standard backtracking engine runs in linear time; a
+# DFA engine such as google-re2 was measured ~10x slower on these short
+# matches because of its per-call binding overhead.
+_STATEMENT_PATTERN = (
+    rf'^{_WS}*(?:'
+    # "always @(posedge clk)" / "always @(*)"
+    r'(?P<always>always[^\n]*)'
+    # "end", "endcase", ... (closes an always block)
+    r'|(?P<end>end[^\n]*)'
+    # MUX2 module instantiation: "MUX2 instance_name ( .A(signalA), .B(signalB), .S(signalS), .Y(outputY) );"
+    # This matches patterns like: MUX2 mux_acc0 ( .A(\acc[0] ), .B(\total[0] ), .S(n0), .Y(n10) );
+    # Also handles: MUX2 mux_rst0 ( .A(n10), .B(1'b0), .S(reset_acc), .Y(\acc_next[0] ) );
+    rf'|(?P<mux2>MUX2{_WS}+\w+{_WS}*\({_WS}*'
+    rf'\.A{_WS}*\({_WS}*(?P<mux_a>[^)\n]+){_WS}*\){_WS}*,{_WS}*'
+    rf'\.B{_WS}*\({_WS}*(?P<mux_b>[^)\n]+){_WS}*\){_WS}*,{_WS}*'
+    rf'\.S{_WS}*\({_WS}*(?P<mux_s>[^)\n]+){_WS}*\){_WS}*,{_WS}*'
+    rf'\.Y{_WS}*\({_WS}*(?P<mux_y>[^)\n]+){_WS}*\){_WS}*\);)'
+    # "assign lhs = rhs;"
+    rf'|(?P<assign>assign{_WS}+(?P<assign_lhs>.+?){_WS}*={_WS}*(?P<assign_rhs>.+?);)'
+    # Procedural assignments inside always blocks: "lhs = rhs;" or "lhs <= rhs;"
+    rf'|(?P<proc>(?P<proc_lhs>[A-Za-z_]\w*(?:\[\d+\])?){_WS}*(?:<=|=){_WS}*(?P<proc_rhs>.+?);)'
+    r')'
+)
+_STATEMENT_RE = re.compile(_STATEMENT_PATTERN, re.M)
+_STATEMENT_BYTES_RE = re.compile(_STATEMENT_PATTERN.encode(), re.M)
+
+# Regex for signal names:
+#  - escaped identifiers: \something_until_whitespace  (e.g. "\a[0]")
+#  - normal identifiers:   a123, n386, f[0], etc.
+_SIGNAL_RE = re.compile(
+    r'(\\[^\s,;]+|[A-Za-z_]\w*(?:\[\d+\])?)'
+)
+
+# Negated signals (handles escaped identifiers like \signal[0])
+# Matches: ~signal, ~\signal[0], etc.
+_NEGATED_SIGNAL_RE = re.compile(r'~\s*(?:\\[^\s&|^]+|[A-Za-z_]\w*(?:\[\d+\])?)')
+# Any signal, negated or not
+_ANY_SIGNAL_RE = re.compile(r'(?:~\s*)?(?:\\[^\s&|^]+|[A-Za-z_]\w*(?:\[\d+\])?)')
+# Bound once: detect_gate_type runs for every assignment in the netlist
+_find_negated_signals = _NEGATED_SIGNAL_RE.findall
+_find_any_signals = _ANY_SIGNAL_RE.findall
+
 def detect_gate_type(expression):
     """
     Analyze a Verilog expression to determine the gate type.
@@ -24,64 +83,53 @@ def detect_gate_type(expression):
         expression: String containing the RHS of an assignment
         
     Returns:
-        Gate type string (e.g., "NOT", "AND", "OR", "XOR", "NAND", "NOR", "ASSIGN")
+        Gate type string, one of GATE_TYPES (e.g., "NOT", "AND", "OR", "XOR",
+        "NAND", "NOR", "ASSIGN")
     """
     expr = expression.strip()
     
-    # Count operators to understand expression complexity
-    and_count = expr.count('&')
-    or_count = expr.count('|')
-    xor_count = expr.count('^')
-    not_count = expr.count('~')
+    # Only the presence of &, | and ^ matters, so membership tests (which stop
+    # at the first hit) replace full counts; only '~' is ever counted, and
+    # only for the NOR/NAND candidates
+    has_and = '&' in expr
+    has_or = '|' in expr
+    has_xor = '^' in expr
     
     # Check for simple NOT: ~signal (no operators except ~)
-    # Pattern: starts with ~, no &, |, ^ operators
-    if expr.startswith('~') and and_count == 0 and or_count == 0 and xor_count == 0:
-        return "NOT"
-    
-    # Pattern to match negated signals (handles escaped identifiers like \signal[0])
-    # Matches: ~signal, ~\signal[0], etc.
-    negated_signal_pattern = r'~\s*(?:\\[^\s&|^]+|[A-Za-z_]\w*(?:\[\d+\])?)'
-    
+    # Pattern: starts with ~, no &, |, ^ operators; without any operator the
+    # expression is a plain wire
+    if not (has_and or has_or or has_xor):
+        return "NOT" if expr.startswith('~') else "ASSIGN"
+
     # Check for NOR pattern: ~a & ~b (De Morgan: ~(a | b))
     # Pattern: multiple negated terms ANDed together, no OR operators
-    if and_count > 0 and or_count == 0 and xor_count == 0 and not_count >= 2:
-        # Find all negated signals
-        negated_signals = re.findall(negated_signal_pattern, expr)
-        # If we have 2+ negated signals and they're all connected by AND operators
-        # (not mixed with non-negated signals), it's likely a NOR
-        if len(negated_signals) >= 2:
-            # Count total signals (negated and non-negated)
-            # Pattern for any signal (negated or not)
-            all_signals_pattern = r'(?:~\s*)?(?:\\[^\s&|^]+|[A-Za-z_]\w*(?:\[\d+\])?)'
-            all_signals = re.findall(all_signals_pattern, expr)
-            # If all signals are negated, it's a NOR
-            if len(negated_signals) == len(all_signals):
-                return "NOR"
-    
     # Check for NAND pattern: ~a | ~b (De Morgan: ~(a & b))
     # Pattern: multiple negated terms ORed together, no AND operators
-    if or_count > 0 and and_count == 0 and xor_count == 0 and not_count >= 2:
-        negated_signals = re.findall(negated_signal_pattern, expr)
+    if not has_xor and has_and != has_or and expr.count('~') >= 2:
+        # Find all negated signals
+        negated_signals = _find_negated_signals(expr)
+        # If we have 2+ negated signals and they're all connected by the
+        # same operator (not mixed with non-negated signals), it's likely
+        # a NOR/NAND
         if len(negated_signals) >= 2:
-            all_signals_pattern = r'(?:~\s*)?(?:\\[^\s&|^]+|[A-Za-z_]\w*(?:\[\d+\])?)'
-            all_signals = re.findall(all_signals_pattern, expr)
-            # If all signals are negated, it's a NAND
+            # Count total signals (negated and non-negated)
+            all_signals = _find_any_signals(expr)
+            # If all signals are negated, it's a NOR (&) or NAND (|)
             if len(negated_signals) == len(all_signals):
-                return "NAND"
-    
+                return "NOR" if has_and else "NAND"
+
     # Check for XOR: a ^ b (no AND, no OR)
-    if xor_count > 0 and and_count == 0 and or_count == 0:
+    if has_xor and not has_and and not has_or:
         return "XOR"
     
     # Check for AND: a & b (no OR, no XOR)
     # This includes cases like a & ~b (AND with one inverted input)
-    if and_count > 0 and or_count == 0 and xor_count == 0:
+    if has_and and not has_or and not has_xor:
         return "AND"
     
     # Check for OR: a | b (no AND, no XOR)
     # This includes cases like a | ~b (OR with one inverted input)
-    if or_count > 0 and and_count == 0 and xor_count == 0:
+    if has_or and not has_and and not has_xor:
         return "OR"
     
     # Mixed operators or complex expression - default to ASSIGN
@@ -103,35 +151,39 @@ def parse_verilog_to_dag(verilog_text):
       We intentionally do NOT add edges from RHS to LHS for these assignments, because
       they represent a cycle-to-cycle transfer (flops), not combinational logic.
 
+    Args:
+        verilog_text: Verilog source as str, or as a bytes-like object (bytes,
+                      mmap); only the statement lines are then decoded
+
     Returns:
         G: nx.DiGraph
         ff_q_nets: set of signals that are clocked registers (Q nets)
         d_nets: set of signals that drive those registers (D nets)
     """
-    # Graph where nodes are net names (strings), edges are data dependencies
-    G = nx.DiGraph()
-
-    # Regex for "assign lhs = rhs;"
-    assign_re = re.compile(r'\s*assign\s+(.+?)\s*=\s*(.+?);')
-
-    # Regex for signal names:
-    #  - escaped identifiers: \something_until_whitespace  (e.g. "\a[0]")
-    #  - normal identifiers:   a123, n386, f[0], etc.
-    signal_re = re.compile(
-        r'(\\[^\s,;]+|[A-Za-z_]\w*(?:\[\d+\])?)'
-    )
-
-    # Procedural assignments inside always blocks: "lhs = rhs;" or "lhs <= rhs;"
-    proc_assign_re = re.compile(
-        r'\s*([A-Za-z_]\w*(?:\[\d+\])?)\s*(<=|=)\s*(.+?);'
-    )
-
-    # Regex for MUX2 module instantiation: "MUX2 instance_name ( .A(signalA), .B(signalB), .S(signalS), .Y(outputY) );"
-    # This matches patterns like: MUX2 mux_acc0 ( .A(\acc[0] ), .B(\total[0] ), .S(n0), .Y(n10) );
-    # Also handles: MUX2 mux_rst0 ( .A(n10), .B(1'b0), .S(reset_acc), .Y(\acc_next[0] ) );
-    mux2_re = re.compile(
-        r'\s*MUX2\s+\w+\s*\(\s*\.A\s*\(\s*([^)]+)\s*\)\s*,\s*\.B\s*\(\s*([^)]+)\s*\)\s*,\s*\.S\s*\(\s*([^)]+)\s*\)\s*,\s*\.Y\s*\(\s*([^)]+)\s*\)\s*\);'
-    )
+    # Graph where nodes are net names (strings), edges are data dependencies.
+    # Nodes and edges are buffered in first-seen order and added in bulk at the
+    # end, which keeps the node/adjacency order of one-at-a-time insertion.
+    nodes = {}  # insertion-ordered set of net names
+    edges = []  # (src, dst, attrs) tuples
+
+    # One attribute dict per gate type, shared by all of its buffered edges:
+    # add_edges_from copies the attributes into a fresh dict for every edge,
+    # so the buffer need not allocate one per edge. Built per call so that
+    # changes to GATE_DELAY take effect.
+    delay_attrs = {gate: {"delay": d} for gate, d in GATE_DELAY.items()}
+    # Gate types without a delay of their own fall back to the delay of the
+    # statement kind; the fallback is resolved here once per gate type
+    # instead of once per assignment
+    comb_attrs = {g: delay_attrs.get(g, delay_attrs["COMB_ALWAYS"]) for g in GATE_TYPES}
+    assign_attrs = {g: delay_attrs.get(g, delay_attrs["ASSIGN"]) for g in GATE_TYPES}
+
+    # A bytes-like source is scanned with the bytes form of the statement
+    # pattern, so the file is never decoded as a whole; only the captured
+    # fields the parser reads are decoded.
+    is_text = isinstance(verilog_text, str)
+    statement_re = _STATEMENT_RE if is_text else _STATEMENT_BYTES_RE
+    find_signals = _SIGNAL_RE.findall
+    edges_append = edges.append
 
     ff_q_nets = set()  # registers updated in clocked always blocks
     d_nets = set()     # nets that drive those registers (D inputs)
@@ -142,13 +194,16 @@ def parse_verilog_to_dag(verilog_text):
     # Counter for generating unique intermediate signal names for MUX2 expansions
     mux2_counter = 0
 
-    for line in verilog_text.splitlines():
-        stripped = line.strip()
+    for m in statement_re.finditer(verilog_text):
+        kind = m.lastgroup
 
         # Detect entry into always blocks
-        if stripped.startswith("always"):
+        if kind == "always":
+            header = m.group("always")
+            if not is_text:
+                header = header.decode()
             # Very simple heuristic: clocked vs combinational
-            if "posedge" in stripped or "negedge" in stripped:
+            if "posedge" in header or "negedge" in header:
                 in_seq_always = True
                 in_comb_always = False
             else:
@@ -159,65 +214,64 @@ def parse_verilog_to_dag(verilog_text):
 
         # Detect end of an always block
         if in_seq_always or in_comb_always:
-            if stripped.startswith("end"):
+            if kind == "end":
                 in_seq_always = False
                 in_comb_always = False
                 continue
 
         # Inside a clocked always block: detect state registers
         if in_seq_always:
-            m = proc_assign_re.match(line)
-            if m:
-                lhs, op, rhs_raw = m.groups()
+            if kind == "proc":
+                lhs, rhs_raw = m.group("proc_lhs", "proc_rhs")
+                if not is_text:
+                    lhs, rhs_raw = lhs.decode(), rhs_raw.decode()
                 lhs = lhs.strip()
                 # Treat LHS as a registered signal (Q net)
                 ff_q_nets.add(lhs)
-                G.add_node(lhs)
+                nodes[lhs] = None
 
                 # RHS signals are the D-inputs that feed the reg
-                rhs_signals = signal_re.findall(rhs_raw)
+                rhs_signals = find_signals(rhs_raw)
                 for s in rhs_signals:
                     s = s.strip()
                     if not s:
                         continue
                     d_nets.add(s)
-                    G.add_node(s)
+                    nodes[s] = None
             # Do NOT add combinational edges from rhs -> lhs here
             # (they are across clock cycles)
             continue
 
         # Inside a combinational always block: build combinational edges
         if in_comb_always:
-            m = proc_assign_re.match(line)
-            if m:
-                lhs, op, rhs_raw = m.groups()
+            if kind == "proc":
+                lhs, rhs_raw = m.group("proc_lhs", "proc_rhs")
+                if not is_text:
+                    lhs, rhs_raw = lhs.decode(), rhs_raw.decode()
                 lhs = lhs.strip()
                 rhs_raw = rhs_raw.strip()
                 
                 # Detect gate type from expression
-                gate_type = detect_gate_type(rhs_raw)
-                delay = GATE_DELAY.get(gate_type, GATE_DELAY["COMB_ALWAYS"])
+                attrs = comb_attrs[detect_gate_type(rhs_raw)]
                 
-                rhs_signals = signal_re.findall(rhs_raw)
+                rhs_signals = find_signals(rhs_raw)
                 for s in rhs_signals:
                     s = s.strip()
                     if not s:
                         continue
-                    G.add_node(s)
-                    G.add_node(lhs)
-                    G.add_edge(s, lhs, delay=delay)
+                    nodes[s] = None
+                    nodes[lhs] = None
+                    edges_append((s, lhs, attrs))
             continue
 
         # Handle MUX2 module instantiations: expand to gate-level logic
         # MUX2 logic: Y = S ? B : A
         # Gate-level: nS = ~S, t0 = A & nS, t1 = B & S, Y = t0 | t1
-        m = mux2_re.match(line)
-        if m:
-            signal_a, signal_b, signal_s, signal_y = m.groups()
-            signal_a = signal_a.strip()
-            signal_b = signal_b.strip()
-            signal_s = signal_s.strip()
-            signal_y = signal_y.strip()
+        if kind == "mux2":
+            ports = m.group("mux_a", "mux_b", "mux_s", "mux_y")
+            if not is_text:
+                ports = [p.decode() for p in ports]
+            signal_a, signal_b, signal_s, signal_y = [p.strip() for p in ports]
             
             # Generate unique intermediate signal names for this MUX2 instance
             mux2_counter += 1
@@ -226,50 +280,50 @@ def parse_verilog_to_dag(verilog_text):
             t1_name = f"mux2_t1_{mux2_counter}"
             
             # Add all nodes
-            G.add_node(signal_a)
-            G.add_node(signal_b)
-            G.add_node(signal_s)
-            G.add_node(nS_name)
-            G.add_node(t0_name)
-            G.add_node(t1_name)
-            G.add_node(signal_y)
-            
-            # NOT gate: S -> nS
-            G.add_edge(signal_s, nS_name, delay=GATE_DELAY["MUX2_NOT"])
+            for name in (signal_a, signal_b, signal_s, nS_name, t0_name, t1_name, signal_y):
+                nodes[name] = None
             
-            # AND gate: A, nS -> t0
-            G.add_edge(signal_a, t0_name, delay=GATE_DELAY["MUX2_AND"])
-            G.add_edge(nS_name, t0_name, delay=GATE_DELAY["MUX2_AND"])
-            
-            # AND gate: B, S -> t1
-            G.add_edge(signal_b, t1_name, delay=GATE_DELAY["MUX2_AND"])
-            G.add_edge(signal_s, t1_name, delay=GATE_DELAY["MUX2_AND"])
-            
-            # OR gate: t0, t1 -> Y
-            G.add_edge(t0_name, signal_y, delay=GATE_DELAY["MUX2_OR"])
-            G.add_edge(t1_name, signal_y, delay=GATE_DELAY["MUX2_OR"])
+            edges.extend((
+                # NOT gate: S -> nS
+                (signal_s, nS_name, delay_attrs["MUX2_NOT"]),
+                # AND gate: A, nS -> t0
+                (signal_a, t0_name, delay_attrs["MUX2_AND"]),
+                (nS_name, t0_name, delay_attrs["MUX2_AND"]),
+                # AND gate: B, S -> t1
+                (signal_b, t1_name, delay_attrs["MUX2_AND"]),
+                (signal_s, t1_name, delay_attrs["MUX2_AND"]),
+                # OR gate: t0, t1 -> Y
+                (t0_name, signal_y, delay_attrs["MUX2_OR"]),
+                (t1_name, signal_y, delay_attrs["MUX2_OR"]),
+            ))
             
             continue
 
         # Outside any always-block: handle continuous assignments
-        m = assign_re.match(line)
-        if m:
-            lhs_raw, rhs_raw = m.groups()
-            lhs = lhs_raw.strip()
+        if kind == "assign":
+            lhs, rhs_raw = m.group("assign_lhs", "assign_rhs")
+            if not is_text:
+                lhs, rhs_raw = lhs.decode(), rhs_raw.decode()
+            lhs = lhs.strip()
             rhs_raw = rhs_raw.strip()
 
             # Detect gate type from expression
-            gate_type = detect_gate_type(rhs_raw)
-            delay = GATE_DELAY.get(gate_type, GATE_DELAY["ASSIGN"])
+            attrs = assign_attrs[detect_gate_type(rhs_raw)]
 
-            rhs_signals = signal_re.findall(rhs_raw)
+            rhs_signals = find_signals(rhs_raw)
             for s in rhs_signals:
                 s = s.strip()
                 if not s:
                     continue
-                G.add_node(s)
-                G.add_node(lhs)
-                G.add_edge(s, lhs, delay=delay)
+                nodes[s] = None
+                nodes[lhs] = None
+                edges_append((s, lhs, attrs))
+
+    # Bulk insertion: nodes first, so the graph keeps the first-appearance
+    # node order the timing sweeps (and their tie-breaking) depend on
+    G = nx.DiGraph()
+    G.add_nodes_from(nodes)
+    G.add_edges_from(edges)
 
     return G, ff_q_nets, d_nets
 
@@ -284,9 +338,9 @@ if __name__ == "__main__":
     print("Number of edges:", G.number_of_edges())
 
     # Primary inputs = nodes with no predecessors
-    primary_inputs = [n for n in G.nodes if G.in_degree(n) == 0]
+    primary_inputs = [n for n, d in G.in_degree() if d == 0]
     # Primary outputs = nodes with no successors
-    primary_outputs = [n for n in G.nodes if G.out_degree(n) == 0]
+    primary_outputs = [n for n, d in G.out_degree() if d == 0]
 
     print("Primary inputs (first 10):", primary_inputs[:10])
     print("Primary outputs:", primary_outputs)
@@ -294,31 +348,44 @@ if __name__ == "__main__":
     print("Detected FF D nets:", sorted(d_nets))
 
 
-def build_graph_from_verilog(netlist_path: str):
+def build_graph_from_verilog(netlist_path: str, return_indegree: bool = False):
     """
     Parse a Verilog netlist file and return a graph with startpoints and endpoints.
 
     Args:
         netlist_path: Path to the Verilog file
+        return_indegree: also return the indegree of every node, which is
+                         computed here anyway to find the sources
 
     Returns:
         G: nx.DiGraph with delay attributes on edges
         startpoints: List of nodes treated as timing startpoints
         endpoints: List of nodes treated as timing endpoints
+        indeg: dict node -> indegree (only if return_indegree is set); can be
+               passed to Khan_topological_sort while G is unmodified
     """
-    with open(netlist_path, "r") as f:
-        verilog_text = f.read()
-
-    G, ff_q_nets, d_nets = parse_verilog_to_dag(verilog_text)
-
-    # Ensure every edge has a delay attribute
-    for u, v in G.edges():
-        if "delay" not in G[u][v]:
-            G[u][v]["delay"] = GATE_DELAY["ASSIGN"]
-
-    # Combinational start/end based on graph structure
-    comb_start = {n for n in G.nodes() if G.in_degree(n) == 0}
-    comb_end = {n for n in G.nodes() if G.out_degree(n) == 0}
+    # Map the file instead of reading it into a str: the parser scans the
+    # pages in place and decodes only the statement lines
+    with open(netlist_path, "rb") as f:
+        try:
+            verilog_bytes = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:
+            # Empty files cannot be mapped
+            verilog_bytes = b""
+        try:
+            G, ff_q_nets, d_nets = parse_verilog_to_dag(verilog_bytes)
+        finally:
+            if isinstance(verilog_bytes, mmap.mmap):
+                verilog_bytes.close()
+
+    # Every edge already carries a delay: parse_verilog_to_dag builds each
+    # edge from a (u, v, {"delay": ...}) tuple
+
+    # Combinational start/end based on graph structure; the degree views
+    # yield (node, degree) pairs in a single iteration over the adjacency
+    indeg = dict(G.in_degree())
+    comb_start = {n for n, d in indeg.items() if d == 0}
+    comb_end = {n for n, d in G.out_degree() if d == 0}
 
     # Final startpoints/endpoints:
     #  - Startpoints: primary-like sources + FF Q nets (state registers)
@@ -326,4 +393,6 @@ def build_graph_from_verilog(netlist_path: str):
     startpoints = sorted(comb_start.union(ff_q_nets))
     endpoints = sorted(comb_end.union(d_nets))
 
+    if return_indegree:
+        return G, startpoints, endpoints, indeg
     return G, startpoints, endpoints
@@ -0,0 +1,57 @@
+"""
+Optional Numba support for the array kernels.
+
+`njit` resolves to `numba.njit` when Numba is installed. Without Numba it is a
+no-op decorator and `prange` is `range`, so the kernels run as plain Python over
+the same NumPy arrays and the package keeps working (just slower).
+"""
+
+try:
+    from numba import get_num_threads, njit as _numba_njit, prange, threading_layer
+    HAVE_NUMBA = True
+except ImportError:
+    HAVE_NUMBA = False
+
+if HAVE_NUMBA:
+
+    def njit(*args, **kwargs):
+        if not kwargs.get("cache"):
+            return _numba_njit(*args, **kwargs)
+
+        def decorator(func):
+            # Numba names cache files after the source file and the qualname,
+            # but a cached kernel re-imports its defining module by name when
+            # loaded. The package ("sta.Khan") and the script ("Khan") imports
+            # of the same file must therefore not share cache entries.
+            func.__qualname__ = f"{func.__module__}.{func.__qualname__}"
+            return _numba_njit(**kwargs)(func)
+
+        return decorator
+
+    def threads_started():
+        """Whether a parallel kernel has started Numba's worker threads."""
+        try:
+            threading_layer()
+        except ValueError:
+            # Raised until the threading layer is initialized
+            return False
+        return True
+
+else:
+    prange = range
+
+    def get_num_threads():
+        return 1
+
+    def threads_started():
+        return False
+
+    def njit(*args, **kwargs):
+        # Support both the bare `@njit` and the `@njit(cache=True)` forms
+        if len(args) == 1 and callable(args[0]) and not kwargs:
+            return args[0]
+
+        def decorator(func):
+            return func
+
+        return decorator
@@ -1,12 +1,247 @@
+import hashlib
+import importlib.util
+import multiprocessing
+import os
+import pickle
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from io import BytesIO
+
 import networkx as nx
+import numpy as np
 import matplotlib.pyplot as plt
-from matplotlib.animation import FuncAnimation
-from collections import deque
+from matplotlib.animation import ArtistAnimation, FuncAnimation
+from matplotlib.collections import LineCollection, PolyCollection
+from matplotlib.colors import to_rgba
+from collections.abc import Sequence
 
 try:
-    from .Khan import Khan_topological_sort
+    from ._jit import threads_started
+    from .graph_csr import build_csr
+    from .Khan import Khan_topological_sort, _kahn_csr
 except ImportError:
-    from Khan import Khan_topological_sort
+    from _jit import threads_started
+    from graph_csr import build_csr
+    from Khan import Khan_topological_sort, _kahn_csr
+
+
+class _KahnStates(Sequence):
+    """
+    Read-only sequence of Khan states stored as arrays (one entry per state).
+
+    Every node enters the zero-indegree queue exactly once and leaves it in
+    FIFO order, so at any point the queue is a contiguous slice of the final
+    topological order. A state therefore only needs its `step` (number of
+    processed nodes), the queue `tail` and the `current` node; the state dicts
+    are materialized on access.
+    """
+
+    def __init__(self, order, steps, tails, currents):
+        self._order = order
+        # Per-state arrays; `currents` holds the position of the current node
+        # in `order` (-1 for None)
+        self.steps = steps
+        self.tails = tails
+        self.currents = currents
+
+    def __len__(self):
+        return len(self.steps)
+
+    def __getitem__(self, i):
+        if isinstance(i, slice):
+            return [self[j] for j in range(*i.indices(len(self)))]
+        step = int(self.steps[i])
+        cur = int(self.currents[i])
+        return {
+            "step": step,
+            "processed": self._order[:step],
+            "queue": self._order[step:int(self.tails[i])],
+            "current": self._order[cur] if cur >= 0 else None,
+        }
+
+
+def _arrow_heads(segments, xy, node_size):
+    """
+    Arrow head triangles, in data coordinates, for an (n_edges, 2, 2) segment
+    array. Tips are pulled back from the target node so they stay visible.
+    """
+    span = float(np.ptp(xy, axis=0).max()) if len(xy) else 1.0
+    size = 0.02 * span
+    # Approximate node radius in data units (marker area is in points^2)
+    radius = 0.002 * np.sqrt(node_size) * span
+
+    start, end = segments[:, 0], segments[:, 1]
+    d = end - start
+    length = np.hypot(d[:, 0], d[:, 1])[:, None]
+    d = np.divide(d, length, out=np.zeros_like(d), where=length > 0)
+    perp = np.column_stack((-d[:, 1], d[:, 0]))
+    tip = end - radius * d
+    base = tip - size * d
+    return np.stack((tip, base + 0.4 * size * perp, base - 0.4 * size * perp), axis=1)
+
+
+def _draw_background(ax, segments, labels, heads=None):
+    """Draw the static part of a frame: title, edges and (optional) labels."""
+    ax.set_title("Khan's Algorithm: Topological Sort")
+    ax.axis("off")
+
+    # Draw edges once (static background) as a single collection
+    ax.add_collection(
+        LineCollection(segments, colors="gray", alpha=0.3, linewidths=1.0)
+    )
+    if heads is not None:
+        ax.add_collection(
+            PolyCollection(heads, facecolors="gray", edgecolors="none", alpha=0.3)
+        )
+
+    for x, y, label in labels:
+        ax.text(x, y, label, fontsize=6, color="dimgray",
+                ha="center", va="center", clip_on=True)
+
+
+def _draw_nodes(ax, xy, node_size, colors):
+    return ax.scatter(xy[:, 0], xy[:, 1], s=node_size, c=colors, zorder=2)
+
+
+def _draw_status(ax, text=""):
+    return ax.text(
+        0.02,
+        0.02,
+        text,
+        transform=ax.transAxes,
+        fontsize=9,
+        verticalalignment="bottom",
+    )
+
+
+# Budget of pre-rendered node markers (frames x nodes) for ArtistAnimation:
+# every frame keeps its own node collection, so the memory and the setup time
+# grow with frames x nodes, not with the number of frames alone
+ARTIST_ANIMATION_MAX_POINTS = 1_000_000
+
+
+# Static frame data of a rendering worker process, set by _init_frame_worker
+_frame_ctx = {}
+
+
+def _init_frame_worker(segments, heads, labels, xy, node_size):
+    _frame_ctx.update(
+        segments=segments, heads=heads, labels=labels, xy=xy, node_size=node_size
+    )
+
+
+def _render_frame(colors, text):
+    """Render a single animation frame off-screen and return it as PNG bytes."""
+    from matplotlib.figure import Figure
+    from matplotlib.backends.backend_agg import FigureCanvasAgg
+
+    fig = Figure(figsize=(8, 6))
+    FigureCanvasAgg(fig)
+    ax = fig.add_subplot()
+    _draw_background(ax, _frame_ctx["segments"], _frame_ctx["labels"], _frame_ctx["heads"])
+    fig.tight_layout()
+    _draw_nodes(ax, _frame_ctx["xy"], _frame_ctx["node_size"], colors)
+    _draw_status(ax, text)
+
+    buf = BytesIO()
+    fig.savefig(buf, format="png")
+    return buf.getvalue()
+
+
+def _layout_backend(G: nx.DiGraph):
+    """
+    Name of the layout _fast_layout uses for G given the installed packages:
+    "spring", "fa2" (ForceAtlas2), "sfdp" (Graphviz) or "layered".
+    """
+    if len(G) > 500:
+        for backend, module in (("fa2", "fa2"), ("sfdp", "pygraphviz"), ("spring", "scipy")):
+            if importlib.util.find_spec(module) is not None:
+                return backend
+        return "layered"
+    return "spring"
+
+
+def _fast_layout(G: nx.DiGraph, seed: int = 42, iterations: int = 20):
+    """
+    Force-directed layout that stays tractable on large netlists.
+
+    Small graphs keep nx.spring_layout. Above 500 nodes the O(V^2) spring
+    forces dominate, so a Barnes-Hut layout is used when available: ForceAtlas2
+    (fa2 package) or Graphviz sfdp (pygraphviz). Without either, it falls back
+    to nx.spring_layout, which needs scipy at that size; without scipy the
+    DAG is drawn with the linear-time level layout of run_sta.layered_layout.
+
+    Args:
+        G: NetworkX DiGraph to lay out
+        seed: Random seed of the spring layout
+        iterations: Number of spring layout iterations
+
+    Returns:
+        Dictionary of positions keyed by node
+    """
+    backend = _layout_backend(G)
+    if backend == "fa2":
+        from fa2 import ForceAtlas2
+        return ForceAtlas2(gravity=1.0, barnesHutOptimize=True, verbose=False) \
+            .forceatlas2_networkx_layout(G.to_undirected(), iterations=50)
+    if backend == "sfdp":
+        return nx.nx_agraph.graphviz_layout(G, prog="sfdp")
+    if backend == "layered":
+        # Imported here: run_sta imports this module
+        try:
+            from .run_sta import layered_layout
+        except ImportError:
+            from run_sta import layered_layout
+        return layered_layout(G)
+    return nx.spring_layout(G, seed=seed, iterations=iterations)
+
+
+def _cached_layout(G: nx.DiGraph, seed: int = 42, iterations: int = 20,
+                   cache_dir: str = ".layout_cache"):
+    """
+    _fast_layout memoized on disk.
+
+    The cache key hashes the node and edge lists in iteration order together
+    with the layout parameters and the layout backend, since the layout
+    depends on all of them (a layered fallback is recomputed once fa2, sfdp
+    or scipy become available). Entries are written to a temporary file and
+    renamed into place, so an interrupted run never leaves a truncated one.
+
+    Args:
+        G: NetworkX DiGraph to lay out
+        seed: Random seed of the layout
+        iterations: Number of spring layout iterations
+        cache_dir: Directory holding the cached layouts (None disables caching)
+
+    Returns:
+        Dictionary of positions keyed by node
+    """
+    if cache_dir is None:
+        return _fast_layout(G, seed=seed, iterations=iterations)
+
+    key = repr((list(G.nodes()), list(G.edges()), seed, iterations, _layout_backend(G)))
+    path = os.path.join(cache_dir, hashlib.sha1(key.encode()).hexdigest() + ".pkl")
+    if os.path.exists(path):
+        try:
+            with open(path, "rb") as f:
+                return pickle.load(f)
+        except (EOFError, pickle.UnpicklingError):
+            # Unreadable entry (e.g. left by an older version): recompute it
+            pass
+
+    pos = _fast_layout(G, seed=seed, iterations=iterations)
+    os.makedirs(cache_dir, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=cache_dir, suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            pickle.dump(pos, f)
+        os.replace(tmp_path, path)
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
+    return pos
+
 
 def Khan_with_states(G: nx.DiGraph, skip_intermediate=True):
     """
@@ -24,7 +259,8 @@ def Khan_with_states(G: nx.DiGraph, skip_intermediate=True):
                           (skips the "after updating" states to reduce frames)
                           
     Returns:
-        Tuple of (topological_order, list_of_states)
+        Tuple of (topological_order, states), where states is a read-only
+        sequence of state dicts built on access
         
     Raises:
         TypeError: If graph is not directed
@@ -33,64 +269,52 @@ def Khan_with_states(G: nx.DiGraph, skip_intermediate=True):
     if not G.is_directed():
         raise TypeError("Graph must be a directed graph (DiGraph).")
 
-    indeg = {u: G.in_degree(u) for u in G.nodes()}
-    q = deque([u for u, d in indeg.items() if d == 0])
-
-    order = []
-    states = []
-
-    # Initial state (before any node is removed)
-    states.append(
-        {
-            "step": 0,
-            "processed": list(order),
-            "queue": list(q),
-            "current": None,
-        }
-    )
-
-    step = 0
-    while q:
-        u = q.popleft()
-        order.append(u)
-        step += 1
-
-        # State when processing node u
-        states.append(
-            {
-                "step": step,
-                "processed": list(order),
-                "queue": list(q),
-                "current": u,
-            }
-        )
-
-        for v in G.successors(u):
-            indeg[v] -= 1
-            if indeg[v] == 0:
-                q.append(v)
-
-        # Only record intermediate state if requested (for smoother animation)
-        if not skip_intermediate:
-            states.append(
-                {
-                    "step": step,
-                    "processed": list(order),
-                    "queue": list(q),
-                    "current": None,
-                }
-            )
-
-    if len(order) != len(G):
+    node_list, indptr, indices, _ = build_csr(G)
+    n = len(node_list)
+    topo, count = _kahn_csr(indptr, indices)
+    if count != n:
         raise nx.NetworkXUnfeasible(
             "Graph contains a cycle; topological sort not possible."
         )
+    order = [node_list[i] for i in topo.tolist()]
+
+    # Step at which each node enters the queue: 0 for sources, otherwise the
+    # step at which its last predecessor is processed (positions are 0-based,
+    # steps are 1-based).
+    pos = np.empty(n, dtype=np.int32)
+    pos[topo] = np.arange(n, dtype=np.int32)
+    src = np.repeat(np.arange(n, dtype=np.int32), np.diff(indptr))
+    enqueue_step = np.zeros(n, dtype=np.int32)
+    np.maximum.at(enqueue_step, indices, pos[src] + 1)
+    # tail_after[s]: queue tail once step s has pushed its successors
+    tail_after = np.cumsum(np.bincount(enqueue_step, minlength=n + 1))
+
+    # State 0 is the initial queue; state s shows node order[s-1] being
+    # processed, before its successors have been pushed.
+    step_ids = np.arange(1, n + 1, dtype=np.int32)
+    if skip_intermediate:
+        steps = np.concatenate(([0], step_ids))
+        tails = np.concatenate(([tail_after[0]], tail_after[:n]))
+        currents = np.concatenate(([-1], step_ids - 1))
+    else:
+        # Interleave the "processing" and the "after updating" state of each step
+        steps = np.concatenate(([0], np.repeat(step_ids, 2)))
+        tails = np.concatenate(
+            ([tail_after[0]], np.column_stack((tail_after[:n], tail_after[1:])).ravel())
+        )
+        currents = np.concatenate(
+            ([-1], np.column_stack((step_ids - 1, np.full(n, -1))).ravel())
+        )
 
-    return order, states
+    return order, _KahnStates(order, steps, tails, currents)
 
 
 def animate_khan(G: nx.DiGraph, interval: int = 10, max_nodes: int = 100, 
-                 show_labels: bool = True):
+                 show_labels: bool = True, max_artist_frames: int = 2000,
+                 save_path: str = None, n_jobs: int = None,
+                 layout_cache_dir: str = ".layout_cache", max_frames: int = None,
+                 skip_intermediate: bool = True, use_blit: bool = True,
+                 layout: dict = None):
     """
     Create an animation of Khan's algorithm on graph G.
 
@@ -99,169 +323,242 @@ def animate_khan(G: nx.DiGraph, interval: int = 10, max_nodes: int = 100,
         interval: Time between frames in milliseconds
         max_nodes: If graph has more nodes, subsample or use simpler visualization
         show_labels: Whether to show node labels (slower if True)
+        max_artist_frames: Up to this many frames (and at most
+                           ARTIST_ANIMATION_MAX_POINTS frames x nodes), every
+                           frame is pre-rendered as its own artists and played
+                           back with ArtistAnimation; larger animations fall
+                           back to FuncAnimation to bound memory
+        save_path: If given, render the frames off-screen in parallel and
+                   write them to this file (any animated format Pillow can
+                   save, e.g. .gif) instead of showing the animation
+        n_jobs: Number of worker processes used with save_path
+                (default: all CPUs; 1 renders in-process). Once Numba's
+                parallel kernels have run, the workers are spawned and
+                re-import __main__, so scripts must call animate_khan under
+                `if __name__ == "__main__":` (or the frames are rendered
+                in-process after the pool fails)
+        layout_cache_dir: Directory where the layout is cached between calls
+                          (None disables the cache)
+        max_frames: If given, show only about this many evenly strided states
+                    (the final state is always included)
+        skip_intermediate: Passed to Khan_with_states; False adds an
+                           "after updating" frame per step
+        use_blit: Whether the animation redraws only the changed artists
+        layout: Optional precomputed {node: (x, y)} positions; by default a
+                cached force-directed layout is computed
         
     Returns:
-        FuncAnimation object
+        ArtistAnimation or FuncAnimation object, or None when save_path is given
     """
     # For very large graphs, warn user
     if len(G) > max_nodes:
         print(f"Warning: Graph has {len(G)} nodes. Consider using a smaller subgraph for animation.")
     
-    order, states = Khan_with_states(G, skip_intermediate=True)
+    order, states = Khan_with_states(G, skip_intermediate=skip_intermediate)
 
-    cmap = plt.cm.get_cmap('plasma')
+    cmap = plt.get_cmap('plasma')
     num_frames = len(states) if len(states) > 1 else 1
 
-    # Use spring layout but with reduced iterations for speed
-    pos = nx.spring_layout(G, seed=42, iterations=20)
-
-    fig, ax = plt.subplots(figsize=(8, 6))
-    plt.tight_layout()
-
-    # Handles that will be reused across frames (for faster animation)
-    node_collection = None
-    text_annotation = None
-
-    # Pre-compute all colors for all states (faster than computing each frame)
-    # Track when each node was first processed to "remember" its color
-    node_processed_at = {}  # node -> frame index when it was processed
-    
-    # First pass: determine when each node was processed
-    for frame_idx, state in enumerate(states):
-        current = state["current"]
-        if current is not None and current not in node_processed_at:
-            node_processed_at[current] = frame_idx
-    
-    # Pre-compute the color each node should have based on when it was processed
-    node_colors = {}  # node -> (r, g, b, a) color tuple
-    for node, process_frame in node_processed_at.items():
-        t = process_frame / (num_frames - 1) if num_frames > 1 else 0.0
-        step_color = cmap(t)
-        node_colors[node] = (step_color[0], step_color[1], step_color[2], 0.8)
-    
-    # Pre-compute all colors for all frames
-    all_colors = []
-    processed_sets = []
-    queue_sets = []
-    current_nodes = []
-    
-    for frame_idx, state in enumerate(states):
-        processed = set(state["processed"])
-        queue = set(state["queue"])
-        current = state["current"]
-        
-        processed_sets.append(processed)
-        queue_sets.append(queue)
-        current_nodes.append(current)
-        
-        # Current step color for the node being processed now
-        t = frame_idx / (num_frames - 1) if num_frames > 1 else 0.0
-        step_color = cmap(t)
-        
-        colors = []
-        for n in G.nodes():
-            if n == current:
-                # Current node being processed gets the current step color
-                colors.append(step_color)
-            elif n in processed:
-                # Processed nodes keep their "remembered" color from when they were processed
-                colors.append(node_colors.get(n, "lightgray"))
-            elif n in queue:
-                # Queue nodes get a lighter version of current step color
-                colors.append((step_color[0], step_color[1], step_color[2], 0.5))
-            else:
-                colors.append("lightgray")
-        all_colors.append(colors)
-
-    def init():
-        nonlocal node_collection, text_annotation
-
-        ax.clear()
-        ax.set_title("Khan's Algorithm: Topological Sort")
-        ax.axis("off")
-
-        # Draw edges once (static background)
-        nx.draw_networkx_edges(
-            G,
-            pos,
-            ax=ax,
-            arrows=True,
-            arrowsize=8,
-            alpha=0.3,
-            edge_color="gray",
-        )
-
-        # Initial node colors and size
-        node_size = 300 if len(G) < 50 else 100
-        node_collection = nx.draw_networkx_nodes(
-            G,
-            pos,
-            ax=ax,
-            node_color=all_colors[0],
-            node_size=node_size,
-        )
-
-        # Labels only for smaller graphs, drawn once
-        if show_labels and len(G) < 100:
-            nx.draw_networkx_labels(
-                G,
-                pos,
-                ax=ax,
-                font_size=6,
-                font_color="dimgray",
-            )
-
-        # Create a text artist that we will update per frame
-        text_annotation = ax.text(
-            0.02,
-            0.02,
-            "",
-            transform=ax.transAxes,
-            fontsize=9,
-            verticalalignment="bottom",
-        )
-
-        return node_collection, text_annotation
-
-    def update(frame):
-        state = states[frame]
-
-        # Update node colors using precomputed colors
-        node_collection.set_color(all_colors[frame])
+    # Force-directed layout with reduced iterations for speed, cached on disk
+    if layout is not None:
+        pos = layout
+    else:
+        pos = _cached_layout(G, seed=42, iterations=20, cache_dir=layout_cache_dir)
+
+    # Nodes are kept in topological order: processed nodes, the current node
+    # and the queue are then contiguous position ranges in every frame
+    steps, tails, currents = states.steps, states.tails, states.currents
+    n = len(order)
+
+    # Step color per frame; queue nodes get a lighter version of it
+    if num_frames > 1:
+        step_colors = cmap(np.arange(len(states)) / (num_frames - 1))
+    else:
+        step_colors = cmap(np.zeros(len(states)))
+    queue_colors = step_colors.copy()
+    queue_colors[:, 3] = 0.5
+
+    # Memoize the color each node keeps once processed: the step color of the
+    # frame in which it was current, at alpha 0.8
+    is_current = currents >= 0
+    final_colors = np.empty((n, 4))
+    final_colors[currents[is_current]] = step_colors[is_current]
+    final_colors[:, 3] = 0.8
+
+    gray = to_rgba("lightgray")
+    cur_colors = np.tile(gray, (n, 1))
+    last_frame = -1
+
+    def paint(frame):
+        """Update cur_colors to `frame`, touching only nodes that changed."""
+        nonlocal last_frame
+        step, tail, current = steps[frame], tails[frame], currents[frame]
+        if last_frame >= 0 and frame > last_frame:
+            # Newly processed nodes and the previously current node; the queue
+            # tail only grows, so nodes past it are still gray
+            lo = steps[last_frame]
+            if currents[last_frame] >= 0:
+                lo = min(lo, currents[last_frame])
+        else:
+            # Non-sequential access: repaint everything
+            lo = 0
+            cur_colors[tail:] = gray
+        cur_colors[lo:step] = final_colors[lo:step]
+        cur_colors[step:tail] = queue_colors[frame]
+        if current >= 0:
+            # Current node being processed gets the current step color
+            cur_colors[current] = step_colors[frame]
+        last_frame = frame
+        return cur_colors
+
+    # Edges as one (n_edges, 2, 2) array, drawn once as a single collection
+    segments = np.array(
+        [(pos[u], pos[v]) for u, v in G.edges()], dtype=np.float32
+    ).reshape(-1, 2, 2)
+    # Labels only for smaller graphs, drawn once
+    labels = []
+    if show_labels and len(G) < 100:
+        labels = [(pos[u][0], pos[u][1], str(u)) for u in G.nodes()]
+
+    node_size = 300 if len(G) < 50 else 100
+    xy = np.array([pos[u] for u in order]).reshape(-1, 2)
+    # Arrow heads only for small graphs, where they stay readable
+    heads = _arrow_heads(segments, xy, node_size) if len(G) < 50 else None
+
+    # States shown in the animation, strided down to about max_frames
+    frame_ids = list(range(len(states)))
+    if max_frames is not None and len(states) > max_frames:
+        stride = max(1, len(states) // max_frames)
+        frame_ids = frame_ids[::stride]
+        if frame_ids[-1] != len(states) - 1:
+            frame_ids.append(len(states) - 1)
+
+    def frame_text(frame):
+        # Counts come straight from the state arrays: processed nodes are
+        # order[:step] and the queue is order[step:tail], so no per-frame
+        # list or set of nodes is built
+        step, tail, current = int(steps[frame]), int(tails[frame]), int(currents[frame])
+        queue_len = tail - step
 
         # Simplified text (avoid huge strings for large graphs)
         if len(G) < 50:
-            queue_str = ", ".join(str(x) for x in state["queue"][:10]) or "(empty)"
-            if len(state["queue"]) > 10:
-                queue_str += f", ... ({len(state['queue'])} total)"
-            processed_str = f"{len(state['processed'])} nodes"
+            queue_str = ", ".join(str(x) for x in order[step:min(tail, step + 10)]) or "(empty)"
+            if queue_len > 10:
+                queue_str += f", ... ({queue_len} total)"
         else:
-            queue_str = f"{len(state['queue'])} nodes"
-            processed_str = f"{len(state['processed'])} nodes"
+            queue_str = f"{queue_len} nodes"
+        processed_str = f"{step} nodes"
 
-        current_str = state["current"] if state["current"] is not None else "None"
+        current_str = order[current] if current >= 0 else "None"
 
-        text = (
-            f"Step: {state['step']}/{len(order)}\n"
+        return (
+            f"Step: {step}/{len(order)}\n"
             f"Current: {current_str}\n"
             f"Queue: {queue_str}\n"
             f"Processed: {processed_str}"
         )
 
-        text_annotation.set_text(text)
+    if save_path is not None:
+        from PIL import Image
+
+        # Frames are independent once their colors are known: render them in
+        # worker processes and stitch the PNGs into one animated file
+        def frame_colors():
+            return (paint(frame).copy() for frame in frame_ids)
+
+        texts = [frame_text(frame) for frame in frame_ids]
+        frame_ctx = (segments, heads, labels, xy, node_size)
+        workers = n_jobs or os.cpu_count() or 1
+        pngs = None
+        if workers > 1:
+            # A fork taken after Numba's parallel kernels have started their
+            # thread pool hangs at exit, so only then are the workers spawned
+            context = multiprocessing.get_context("spawn" if threads_started() else None)
+            try:
+                with ProcessPoolExecutor(
+                    max_workers=workers,
+                    mp_context=context,
+                    initializer=_init_frame_worker,
+                    initargs=frame_ctx,
+                ) as executor:
+                    pngs = list(executor.map(_render_frame, frame_colors(), texts, chunksize=16))
+            except BrokenProcessPool:
+                # e.g. spawned workers re-importing an unguarded __main__
+                print("Warning: frame workers failed; rendering the frames in-process.")
+        if pngs is None:
+            _init_frame_worker(*frame_ctx)
+            pngs = [_render_frame(colors, text) for colors, text in zip(frame_colors(), texts)]
+
+        images = [Image.open(BytesIO(png)) for png in pngs]
+        images[0].save(
+            save_path,
+            save_all=True,
+            append_images=images[1:],
+            duration=interval,
+            loop=0,
+        )
+        return None
 
-        return node_collection, text_annotation
+    fig, ax = plt.subplots(figsize=(8, 6))
+    _draw_background(ax, segments, labels, heads)
+    plt.tight_layout()
 
-    anim = FuncAnimation(
-        fig,
-        update,
-        frames=len(states),
-        init_func=init,
-        interval=interval,
-        blit=True,
-        repeat=False,
-    )
+    if (len(frame_ids) <= max_artist_frames
+            and len(frame_ids) * len(xy) <= ARTIST_ANIMATION_MAX_POINTS):
+        # Pre-render one node collection and one text artist per frame and let
+        # the animation toggle their visibility, with no per-frame callback.
+        # They start hidden, so the first draw does not rasterize every frame
+        # stacked on top of each other.
+        frames = []
+        for frame in frame_ids:
+            node_collection = _draw_nodes(ax, xy, node_size, paint(frame).copy())
+            text_annotation = _draw_status(ax, frame_text(frame))
+            node_collection.set_visible(False)
+            text_annotation.set_visible(False)
+            frames.append([node_collection, text_annotation])
+
+        anim = ArtistAnimation(
+            fig,
+            frames,
+            interval=interval,
+            blit=use_blit,
+            repeat=False,
+        )
+    else:
+        # Handles that will be reused across frames (for faster animation)
+        node_collection = _draw_nodes(ax, xy, node_size, paint(frame_ids[0]).copy())
+        text_annotation = _draw_status(ax)
+
+        def update(frame):
+            # Replay the color changes of this frame; with blitting only the
+            # node collection and the text are redrawn
+            node_collection.set_facecolors(paint(frame))
+            text_annotation.set_text(frame_text(frame))
+            return node_collection, text_annotation
+
+        anim = FuncAnimation(
+            fig,
+            update,
+            frames=frame_ids,
+            interval=interval,
+            blit=use_blit,
+            repeat=False,
+        )
 
     plt.show()
 
     return anim
+
+
+def _example_graph():
+    """Small DAG used by the module's example run."""
+    G = nx.DiGraph()
+    G.add_edges_from([
+        ("a", "c"), ("b", "c"), ("b", "d"), ("c", "e"),
+        ("d", "e"), ("d", "f"), ("e", "g"), ("f", "g"),
+    ])
+    return G
+
+
+if __name__ == "__main__":
+    anim = animate_khan(_example_graph(), interval=500)
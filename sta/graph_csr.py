@@ -0,0 +1,192 @@
+"""
+Compressed sparse row (CSR) packing of timing graphs for the array kernels.
+
+The CSR tuple of a graph is built once and can be shared by the topological
+sort and the forward/backward sweeps of one STA run.
+"""
+
+from typing import Dict, Hashable, List, Optional
+
+import networkx as nx
+import numpy as np
+
+try:
+    from ._jit import HAVE_NUMBA, get_num_threads, njit
+except ImportError:
+    from _jit import HAVE_NUMBA, get_num_threads, njit
+
+# Mean number of nodes per topological level from which the level-parallel
+# sweeps beat the sequential ones: below it, dispatching every level to the
+# thread pool costs more than relaxing its nodes on one core.
+PARALLEL_MIN_LEVEL_WIDTH = 2048
+
+
+def build_csr(G: nx.DiGraph):
+    """
+    Relabel the nodes of G to contiguous int32 IDs and pack its adjacency as CSR.
+
+    Node IDs follow G's node iteration order and the successors of each node
+    keep G's adjacency order, so array-based traversals visit nodes in exactly
+    the same order as the equivalent NetworkX traversal.
+
+    Args:
+        G: NetworkX DiGraph to pack
+
+    Returns:
+        node_list: list of original node labels, indexed by node ID
+        indptr: int32 array of length n+1; successors of u are
+                indices[indptr[u]:indptr[u+1]]
+        indices: int32 array of length |E| with successor node IDs
+        node_index: dict mapping node label -> node ID
+    """
+    # G.adjacency() yields the raw successor dicts in node order, avoiding a
+    # view object per G.succ[u] lookup
+    adjacency = list(G.adjacency())
+    node_list = [u for u, _ in adjacency]
+    n = len(node_list)
+    node_index: Dict[Hashable, int] = {u: i for i, u in enumerate(node_list)}
+
+    indptr = np.zeros(n + 1, dtype=np.int32)
+    np.cumsum(
+        np.fromiter((len(nbrs) for _, nbrs in adjacency), dtype=np.int32, count=n),
+        out=indptr[1:],
+    )
+    indices = np.fromiter(
+        (node_index[v] for _, nbrs in adjacency for v in nbrs),
+        dtype=np.int32,
+        count=int(indptr[-1]),
+    )
+    return node_list, indptr, indices, node_index
+
+
+def edge_delays(G: nx.DiGraph, node_list: List[Hashable], delay_attr: str = "delay") -> np.ndarray:
+    """
+    Edge delays as a float64 array aligned with the CSR `indices` of `build_csr`.
+    Edges without `delay_attr` get 0.0.
+    """
+    succ = dict(G.adjacency())
+    return np.fromiter(
+        (float(data.get(delay_attr, 0.0)) for u in node_list for data in succ[u].values()),
+        dtype=np.float64,
+        count=sum(map(len, succ.values())),
+    )
+
+
+def topo_node_ids(topo_order, node_index: Dict[Hashable, int]) -> np.ndarray:
+    """
+    A topological order as an int32 array of CSR node IDs.
+
+    Args:
+        topo_order: list of node labels, or an int array of node IDs (e.g.
+                    `Khan_topological_sort(G, csr=csr, as_array=True)`),
+                    which is used as is
+        node_index: label -> node ID mapping from `build_csr`
+    """
+    if isinstance(topo_order, np.ndarray):
+        return topo_order.astype(np.int32, copy=False)
+    return np.fromiter((node_index[u] for u in topo_order), dtype=np.int32, count=len(topo_order))
+
+
+@njit(cache=True, boundscheck=False)
+def topo_levels(indptr: np.ndarray, indices: np.ndarray, topo: np.ndarray):
+    """
+    Topological level (longest distance in edges from a source) of every node.
+
+    Every edge goes from a lower to a strictly higher level, so the nodes of
+    one level are independent and can be relaxed together.
+
+    Args:
+        indptr, indices: CSR arrays from `build_csr`
+        topo: int32 array of node IDs in topological order
+
+    Returns:
+        int32 array of length n with the level of every node
+    """
+    level = np.zeros(indptr.size - 1, dtype=np.int32)
+    for idx in range(topo.size):
+        u = topo[idx]
+        next_level = level[u] + 1
+        for e in range(indptr[u], indptr[u + 1]):
+            v = indices[e]
+            if level[v] < next_level:
+                level[v] = next_level
+    return level
+
+
+def level_buckets(level: np.ndarray):
+    """
+    Group node IDs by topological level.
+
+    Args:
+        level: int32 array from `topo_levels`
+
+    Returns:
+        level_nodes: int32 array of node IDs sorted by level (stable, so in
+                     node ID order within a level)
+        level_starts: int64 array; the nodes of level l are
+                      level_nodes[level_starts[l]:level_starts[l+1]]
+    """
+    level_nodes = np.argsort(level, kind="stable").astype(np.int32)
+    num_levels = int(level.max()) + 1 if level.size else 0
+    level_starts = np.searchsorted(level[level_nodes], np.arange(num_levels + 1)).astype(np.int64)
+    return level_nodes, level_starts
+
+
+def fanin_csr(indptr: np.ndarray, indices: np.ndarray, rank: np.ndarray):
+    """
+    Reverse (fan-in) CSR of a CSR graph.
+
+    The fan-in of every node is sorted by `rank` of the driving node (e.g. its
+    position in a topological order), so a pull over the fan-in sees the
+    edges in the same order as a push sweep along that order.
+
+    Args:
+        indptr, indices: CSR arrays from `build_csr`
+        rank: int array of length n used to order each fan-in
+
+    Returns:
+        rev_indptr: int32 array of length n+1; the fan-in of v is
+                    rev_*[rev_indptr[v]:rev_indptr[v+1]]
+        rev_edges: int32 array of forward edge IDs (positions in `indices`)
+        rev_src: int32 array of the driving node of every fan-in edge
+    """
+    n = indptr.size - 1
+    src = np.repeat(np.arange(n, dtype=np.int32), np.diff(indptr))
+    # lexsort: last key is primary, so edges are grouped by target node
+    rev_edges = np.lexsort((rank[src], indices)).astype(np.int32)
+    rev_indptr = np.zeros(n + 1, dtype=np.int32)
+    np.cumsum(np.bincount(indices, minlength=n), out=rev_indptr[1:])
+    return rev_indptr, rev_edges, src[rev_edges]
+
+
+def level_parallel_pays_off(n_nodes: int, n_levels: int) -> bool:
+    """Whether the level-parallel sweeps are expected to win (the auto policy)."""
+    return (
+        HAVE_NUMBA
+        and get_num_threads() > 1
+        and n_nodes >= PARALLEL_MIN_LEVEL_WIDTH * max(n_levels, 1)
+    )
+
+
+def plan_level_sweep(indptr: np.ndarray, indices: np.ndarray, topo: np.ndarray,
+                     parallel: Optional[bool] = None):
+    """
+    Decide whether a sweep runs level-parallel and compute its levels if so.
+
+    Args:
+        indptr, indices: CSR arrays from `build_csr`
+        topo: int32 array of node IDs in topological order
+        parallel: True/False to force a choice, None for the auto policy
+
+    Returns:
+        Tuple of (parallel, level, level_nodes, level_starts); the level
+        arrays are None when they were not needed to decide
+    """
+    n = indptr.size - 1
+    if parallel is False or (parallel is None and not level_parallel_pays_off(n, 1)):
+        return False, None, None, None
+    level = topo_levels(indptr, indices, topo)
+    level_nodes, level_starts = level_buckets(level)
+    if parallel is None:
+        parallel = level_parallel_pays_off(n, level_starts.size - 1)
+    return parallel, level, level_nodes, level_starts
@@ -1,10 +1,26 @@
-import networkx as nx
-import matplotlib.pyplot as plt
+import argparse
+import heapq
 import os
 import sys
 import time
+
+import networkx as nx
+import numpy as np
+import matplotlib
+
+# No display (headless server/CI): skip the GUI backend's startup and only
+# save figures. Must be chosen before pyplot is imported.
+HEADLESS = sys.platform.startswith("linux") and not (
+    os.environ.get("DISPLAY") or os.environ.get("WAYLAND_DISPLAY")
+)
+if HEADLESS:
+    matplotlib.use("Agg")
+
+import matplotlib.pyplot as plt
+from matplotlib.collections import LineCollection, PolyCollection
+from collections import Counter
+from collections.abc import Mapping
 from typing import Iterable, Hashable, Optional, Dict
-from visualize_start_and_end_points import visualize_start_and_endpoints
 
 # Handle imports for both module and direct script execution
 # When run as a script, add the sta directory to path first
@@ -17,148 +33,386 @@ if __name__ == "__main__" or not __package__:
 try:
     from .animate_khan import animate_khan
     from .animate_khan import Khan_with_states
-    from .Khan import Khan_topological_sort
-    from .forwards import forward_arrival_times
-    from .backwards import backward_required_times
-    from .slack_computation import compute_slacks
+    from .animate_khan import _arrow_heads
+    from ._jit import HAVE_NUMBA, njit
+    from .graph_csr import (
+        build_csr, edge_delays, fanin_csr, level_buckets, topo_levels, topo_node_ids,
+    )
+    from .Khan import Khan_topological_sort, _kahn_csr
+    from .Forwards import _arrival_dicts, _forward_sweep
+    from .Backwards import backward_required_times_and_slacks
+    from .Verilog_Parcer import build_graph_from_verilog
+    from .slack_computation import slacks_from_arrays
+    from .visualize_start_and_end_points import visualize_start_and_endpoints
 except ImportError:
     # When run directly as a script, use absolute imports
     from animate_khan import animate_khan
     from animate_khan import Khan_with_states
-    from Khan import Khan_topological_sort
-    from forwards import forward_arrival_times
-    from backwards import backward_required_times
-    from slack_computation import compute_slacks
+    from animate_khan import _arrow_heads
+    from _jit import HAVE_NUMBA, njit
+    from graph_csr import (
+        build_csr, edge_delays, fanin_csr, level_buckets, topo_levels, topo_node_ids,
+    )
+    from Khan import Khan_topological_sort, _kahn_csr
+    from Forwards import _arrival_dicts, _forward_sweep
+    from Backwards import backward_required_times_and_slacks
+    from Verilog_Parcer import build_graph_from_verilog
+    from slack_computation import slacks_from_arrays
+    from visualize_start_and_end_points import visualize_start_and_endpoints
 
 # Number of critical paths to find when plotting
 k = 5  # adjust as needed
 
-def run_sta(
+def _run_sta_arrays(
     G: nx.DiGraph,
     startpoints: Iterable[Hashable],
     endpoints: Iterable[Hashable],
     Tclk: float,
-    *,
-    setup: float = 0.05,
-    clock_to_q: float = 0.05,
-    startpoint_overrides: Optional[Dict[Hashable, float]] = None,
-    endpoint_overrides: Optional[Dict[Hashable, float]] = None,
-    delay_attr: str = "delay",
-    eps: float = 1e-12,
+    setup: float,
+    clock_to_q: float,
+    startpoint_overrides: Optional[Dict[Hashable, float]],
+    endpoint_overrides: Optional[Dict[Hashable, float]],
+    delay_attr: str,
+    eps: float,
+    csr=None,
+    delays: Optional[np.ndarray] = None,
+    topo=None,
 ):
-    topo = Khan_topological_sort(G)
-    AT, backpred = forward_arrival_times(
-        G,
-        topo,
-        startpoints,
-        clock_to_q=clock_to_q,
-        startpoint_overrides=startpoint_overrides,
-        delay_attr=delay_attr,
-        eps=eps,
+    """
+    The STA passes of run_sta, with the per-node/per-edge results as arrays
+    over the CSR graph (indexed by node ID / edge ID) plus the CSR itself.
+
+    A prebuilt csr must come with its delays; G is then not read except by
+    the topological sort, which a given topo (labels or node ID array)
+    skips as well.
+    """
+    # Pack the graph and its edge delays once and share them between the
+    # sort and the sweeps, which then never touch G's dicts
+    if csr is None:
+        csr = build_csr(G)
+        delays = edge_delays(G, csr[0], delay_attr)
+    if topo is None:
+        # The order stays an int32 node ID array, which the sweeps index directly
+        topo = Khan_topological_sort(G, csr=csr, as_array=True)
+    else:
+        topo = topo_node_ids(topo, csr[3])
+    AT_arr, bp_head, bp_next = _forward_sweep(
+        csr, delays, topo, startpoints, clock_to_q, startpoint_overrides, eps
     )
-    RT = backward_required_times(
+    # The backward sweep computes the slacks while it finalizes RT
+    RT_arr, node_slack_arr, edge_slack_arr = backward_required_times_and_slacks(
         G,
         topo,
         endpoints,
-        Tclk=Tclk,
+        Tclk,
+        AT_arr,
         setup=setup,
         endpoint_overrides=endpoint_overrides,
         delay_attr=delay_attr,
+        csr=csr,
+        delays=delays,
+    )
+    return {
+        "csr": csr,
+        "delays": delays,
+        "topo": topo,
+        "AT": AT_arr,
+        "RT": RT_arr,
+        "bp_head": bp_head,
+        "bp_next": bp_next,
+        "node_slack": node_slack_arr,
+        "edge_slack": edge_slack_arr,
+    }
+
+
+def _sta_result(arrays):
+    """The label-keyed run_sta result dict from `_run_sta_arrays` output."""
+    node_list, indptr, indices, _ = arrays["csr"]
+    AT, backpred = _arrival_dicts(
+        node_list, indptr, arrays["AT"], arrays["bp_head"], arrays["bp_next"]
+    )
+    node_slack, edge_slack, WNS, TNS = slacks_from_arrays(
+        node_list, indptr, indices, arrays["node_slack"], arrays["edge_slack"]
     )
-    node_slack, edge_slack, WNS, TNS = compute_slacks(G, AT, RT, delay_attr)
     return {
         "AT": AT,
-        "RT": RT,
+        "RT": dict(zip(node_list, arrays["RT"].tolist())),
         "backpred": backpred,
         "node_slack": node_slack,
         "edge_slack": edge_slack,
         "WNS": WNS,
         "TNS": TNS,
-        "topo": topo,
+        "topo": [node_list[u] for u in arrays["topo"].tolist()],
     }
 
-def extract_single_critical_path(
+
+class _LazySTAResult(Mapping):
+    """
+    Read-only run_sta result dict that is converted from the
+    `_run_sta_arrays` output on first access, so STA runs whose label-keyed
+    results are never looked at cost no O(V+E) dict building.
+    """
+
+    def __init__(self, arrays):
+        self._arrays = arrays
+        self._result = None
+
+    def _materialize(self):
+        if self._result is None:
+            self._result = _sta_result(self._arrays)
+            self._arrays = None
+        return self._result
+
+    def __getitem__(self, key):
+        return self._materialize()[key]
+
+    def __iter__(self):
+        return iter(self._materialize())
+
+    def __len__(self):
+        return len(self._materialize())
+
+
+def _node_mask(nodes: Iterable[Hashable], node_index: Dict[Hashable, int], n: int) -> np.ndarray:
+    """Boolean array over the node IDs, set for the given nodes that are in the graph."""
+    mask = np.zeros(n, dtype=np.bool_)
+    for u in nodes:
+        if u in node_index:
+            mask[node_index[u]] = True
+    return mask
+
+
+def run_sta(
     G: nx.DiGraph,
     startpoints: Iterable[Hashable],
     endpoints: Iterable[Hashable],
     Tclk: float,
     *,
-    setup: float = 0.0,
-    clock_to_q: float = 0.0,
+    setup: float = 0.05,
+    clock_to_q: float = 0.05,
     startpoint_overrides: Optional[Dict[Hashable, float]] = None,
     endpoint_overrides: Optional[Dict[Hashable, float]] = None,
     delay_attr: str = "delay",
     eps: float = 1e-12,
+    topo=None,
 ):
-    """Run STA once and extract a single most critical path."""
-    res = run_sta(
-        G,
-        startpoints=startpoints,
-        endpoints=endpoints,
-        Tclk=Tclk,
-        setup=setup,
-        clock_to_q=clock_to_q,
-        startpoint_overrides=startpoint_overrides,
-        endpoint_overrides=endpoint_overrides,
-        delay_attr=delay_attr,
-        eps=eps,
-    )
-
-    node_slack = res["node_slack"]
-    edge_slack = res["edge_slack"]
-    backpred = res["backpred"]
+    """
+    Static timing analysis of G: arrival and required times, back-
+    predecessors, node/edge slacks and WNS/TNS.
+
+    Args:
+        topo: optional topological order of G (labels or CSR node IDs),
+              e.g. the "topo" of an earlier run_sta on the same graph;
+              skips the sort (and its cycle check)
+
+    Returns:
+        dict with "AT", "RT", "backpred", "node_slack", "edge_slack",
+        "WNS", "TNS" and "topo"
+    """
+    return _sta_result(_run_sta_arrays(
+        G, startpoints, endpoints, Tclk, setup, clock_to_q,
+        startpoint_overrides, endpoint_overrides, delay_attr, eps, topo=topo,
+    ))
+
+
+@njit(cache=True, boundscheck=False)
+def _trace_back_csr(bp_head, src, delays, is_start, end):
+    """
+    Follow the first back-predecessor edge (bp_head) from node `end` until a
+    startpoint or a node without one is reached.
+
+    The path is walked twice: once to count its edges, then again to fill
+    exactly sized arrays from the back, so they come out in forward order
+    without a reversed copy.
+
+    Returns:
+        Tuple of (node IDs, edge IDs, total delay) of the path, from its first
+        node to `end`; the delay is summed along the path in that order
+    """
+    count = 0
+    current = end
+    while not is_start[current] and bp_head[current] != -1:
+        count += 1
+        current = src[bp_head[current]]
+
+    nodes = np.empty(count + 1, dtype=np.int64)
+    edges = np.empty(count, dtype=np.int64)
+    current = end
+    nodes[count] = current
+    for i in range(count - 1, -1, -1):
+        e = bp_head[current]
+        edges[i] = e
+        current = src[e]
+        nodes[i] = current
+    total_delay = 0.0
+    for i in range(edges.size):
+        total_delay += delays[edges[i]]
+    return nodes, edges, total_delay
 
-    valid_endpoints = [e for e in endpoints if e in node_slack]
-    if not valid_endpoints:
-        return None
 
-    worst_endpoint = min(valid_endpoints, key=lambda e: node_slack[e])
+def _trace_critical_path(arrays, end_ids, is_start):
+    """
+    Trace the most critical path of one STA run on its arrays.
 
-    path_nodes = []
-    path_edges = []
-    current = worst_endpoint
+    Starts at the endpoint with the smallest slack (the first one among
+    equals) and follows the first recorded back-predecessor until a
+    startpoint or a node without one is reached.
 
-    while True:
-        path_nodes.append(current)
-        if current in startpoints or current not in backpred or not backpred[current]:
-            break
-        pred = backpred[current][0]  # follow the most critical predecessor
-        path_edges.append((pred, current))
-        current = pred
+    Args:
+        arrays: `_run_sta_arrays` output
+        end_ids: node IDs of the endpoints, in endpoint order
+        is_start: boolean startpoint mask over the node IDs
 
-    if len(path_nodes) < 2:
+    Returns:
+        Tuple of (path dict without "sta", edge IDs of the path), or None if
+        there is no endpoint or the path has fewer than two nodes
+    """
+    if not end_ids:
+        return None
+    node_list, indptr, _, _ = arrays["csr"]
+    node_slack = arrays["node_slack"]
+    bp_head = arrays["bp_head"]
+    src = np.repeat(np.arange(len(node_list), dtype=np.int32), np.diff(indptr))
+
+    worst_endpoint = end_ids[int(np.argmin(node_slack[end_ids]))]
+    path_ids, path_edge_ids, total_delay = _trace_back_csr(
+        bp_head, src, arrays["delays"], is_start, worst_endpoint
+    )
+    if path_ids.size < 2:
         return None
 
-    # Reverse so that nodes/edges go from startpoint -> endpoint
-    path_nodes = list(reversed(path_nodes))
-    path_edges = list(reversed(path_edges))
+    path_nodes = [node_list[u] for u in path_ids.tolist()]
+    path_edges = list(zip(path_nodes, path_nodes[1:]))
 
-    # Compute total delay along the path
-    total_delay = 0.0
-    for (u, v) in path_edges:
-        if G.has_edge(u, v):
-            total_delay += float(G[u][v].get(delay_attr, 0.0))
-
-    # Compute WNS/TNS restricted to this path
-    node_slacks = [node_slack.get(n, float("inf")) for n in path_nodes]
-    edge_slacks = [edge_slack.get(e, float("inf")) for e in path_edges]
-    all_slacks = node_slacks + edge_slacks
-
-    if all_slacks:
-        path_WNS = min(all_slacks)
-        path_TNS = sum(s for s in all_slacks if s < 0.0)
-    else:
-        path_WNS = float("inf")
-        path_TNS = 0.0
+    # Compute WNS/TNS restricted to this path; TNS sums the node then the
+    # edge slacks in path order
+    all_slacks = np.concatenate((node_slack[path_ids], arrays["edge_slack"][path_edge_ids]))
 
-    return {
+    path_info = {
         "nodes": path_nodes,
         "edges": path_edges,
-        "delay": total_delay,
-        "WNS": path_WNS,
-        "TNS": path_TNS,
-        "sta": res,
+        "delay": float(total_delay),
+        "WNS": float(all_slacks.min()),
+        "TNS": sum(all_slacks[all_slacks < 0.0].tolist()),
     }
+    return path_info, path_edge_ids
+
+
+def extract_single_critical_path(
+    G: nx.DiGraph,
+    startpoints: Iterable[Hashable],
+    endpoints: Iterable[Hashable],
+    Tclk: float,
+    *,
+    setup: float = 0.0,
+    clock_to_q: float = 0.0,
+    startpoint_overrides: Optional[Dict[Hashable, float]] = None,
+    endpoint_overrides: Optional[Dict[Hashable, float]] = None,
+    delay_attr: str = "delay",
+    eps: float = 1e-12,
+    topo=None,
+):
+    """
+    Run STA once and extract a single most critical path.
+
+    topo: optional topological order of G to reuse (see run_sta).
+    """
+    startpoints = list(startpoints)
+    endpoints = list(endpoints)
+    arrays = _run_sta_arrays(
+        G, startpoints, endpoints, Tclk, setup, clock_to_q,
+        startpoint_overrides, endpoint_overrides, delay_attr, eps, topo=topo,
+    )
+    node_list, _, _, node_index = arrays["csr"]
+    traced = _trace_critical_path(
+        arrays,
+        [node_index[e] for e in endpoints if e in node_index],
+        _node_mask(startpoints, node_index, len(node_list)),
+    )
+    if traced is None:
+        return None
+    path_info = traced[0]
+    path_info["sta"] = _sta_result(arrays)
+    return path_info
+
+
+def iter_k_critical_paths(
+    G: nx.DiGraph,
+    startpoints: Iterable[Hashable],
+    endpoints: Iterable[Hashable],
+    Tclk: float,
+    *,
+    setup: float = 0.0,
+    clock_to_q: float = 0.0,
+    startpoint_overrides: Optional[Dict[Hashable, float]] = None,
+    endpoint_overrides: Optional[Dict[Hashable, float]] = None,
+    delay_attr: str = "delay",
+    eps: float = 1e-12,
+    k: Optional[int] = None,
+    topo=None,
+):
+    """
+    Generate the edge-disjoint critical paths of find_k_critical_paths one
+    at a time, most critical first.
+
+    The first j paths do not depend on k, so a single pass serves every
+    k up to the number of paths consumed (e.g. when timing a sweep over k).
+
+    Args:
+        k: maximum number of paths; None runs until no endpoint is reachable
+        topo: optional topological order of G to reuse (see run_sta). It
+              only replaces the first sort: the tie order of the back-
+              predecessors follows the Kahn order of the graph left after
+              blocking, so that graph is sorted again every iteration.
+        See find_k_critical_paths() for the other parameters.
+
+    Yields:
+        Path dicts as find_k_critical_paths returns them
+    """
+    startpoints = list(startpoints)
+    endpoints = list(endpoints)
+    csr = build_csr(G)
+    node_list, indptr, indices, node_index = csr
+    delays = edge_delays(G, node_list, delay_attr)
+    n = len(node_list)
+    is_start = _node_mask(startpoints, node_index, n)
+    end_ids = [node_index[e] for e in endpoints if e in node_index]
+    src = np.repeat(np.arange(n, dtype=np.int32), np.diff(indptr))
+
+    # Original edge IDs of the edges that are not blocked yet
+    edge_ids = np.arange(indices.size)
+    # Nothing is blocked for the first path (the only one when k == 1), so
+    # it runs on the full CSR without building a residual copy
+    res_csr, res_delays = csr, delays
+
+    found = 0
+    while k is None or found < k:
+        if found:
+            # Block the previous path by dropping its edges
+            edge_ids = np.delete(edge_ids, path_edge_ids)
+            res_indptr = np.zeros(n + 1, dtype=np.int32)
+            np.cumsum(np.bincount(src[edge_ids], minlength=n), out=res_indptr[1:])
+            res_indices = indices[edge_ids]
+            res_csr = (node_list, res_indptr, res_indices, node_index)
+            res_delays = delays[edge_ids]
+            # Removing edges keeps the graph acyclic
+            topo, _ = _kahn_csr(res_indptr, res_indices)
+        arrays = _run_sta_arrays(
+            G, startpoints, endpoints, Tclk, setup, clock_to_q,
+            startpoint_overrides, endpoint_overrides, delay_attr, eps,
+            csr=res_csr,
+            delays=res_delays,
+            topo=topo,
+        )
+        topo = arrays["topo"]
+        traced = _trace_critical_path(arrays, end_ids, is_start)
+        if traced is None:
+            return
+
+        path_info, path_edge_ids = traced
+        path_info["sta"] = _LazySTAResult(arrays)
+        found += 1
+        yield path_info
 
 
 def find_k_critical_paths(
@@ -174,68 +428,371 @@ def find_k_critical_paths(
     delay_attr: str = "delay",
     eps: float = 1e-12,
     k: int = 1,
+    topo=None,
 ):
-    """Extract up to k edge-disjoint critical paths."""
-    work_graph = G.copy()
-    critical_paths = []
-
-    for _ in range(k):
-        path_info = extract_single_critical_path(
-            work_graph,
-            startpoints=startpoints,
-            endpoints=endpoints,
-            Tclk=Tclk,
-            setup=setup,
-            clock_to_q=clock_to_q,
-            startpoint_overrides=startpoint_overrides,
-            endpoint_overrides=endpoint_overrides,
-            delay_attr=delay_attr,
-            eps=eps,
+    """
+    Extract up to k edge-disjoint critical paths.
+
+    After each extraction the edges of the path are blocked before STA is
+    re-run, so no two returned paths share an edge and the same path can
+    never be reported twice; no duplicate filtering of the results is needed.
+
+    G is packed into CSR arrays once. Blocking a path drops its edges from
+    the arrays, which leaves exactly the CSR of G without those edges (node
+    and adjacency order are kept), so every iteration only reruns the
+    compiled sort and sweeps on arrays and traces the path there; G is
+    neither copied nor modified.
+
+    topo: optional topological order of G to reuse (see run_sta).
+
+    Returns:
+        List of path dicts (see extract_single_critical_path), most
+        critical first; shorter than k once no endpoint is reachable. The
+        "sta" result of each path, for the graph it was found on, is built
+        on first access.
+    """
+    return list(iter_k_critical_paths(
+        G,
+        startpoints=startpoints,
+        endpoints=endpoints,
+        Tclk=Tclk,
+        setup=setup,
+        clock_to_q=clock_to_q,
+        startpoint_overrides=startpoint_overrides,
+        endpoint_overrides=endpoint_overrides,
+        delay_attr=delay_attr,
+        eps=eps,
+        k=max(k, 0),
+        topo=topo,
+    ))
+
+
+@njit(cache=True)
+def _k_worst_paths_csr(rev_indptr, rev_src, rev_edges, rev_delay, AT, is_start, end_nodes,
+                       end_required, k):
+    """
+    Best-first k-worst-paths search over the fan-in CSR (see find_k_worst_paths).
+
+    Partial paths (suffixes) live in a pool of parallel lists: pool_node[i] is
+    the first node of suffix i, pool_edge[i] its first edge and pool_next[i]
+    the suffix it extends (-1 for an endpoint). Heap entries are
+    (key, -depth, pool index); the pool index also breaks exact ties in
+    insertion order. Works on NumPy arrays under Numba and on plain lists
+    without it.
+
+    Returns:
+        Tuple of (paths_flat, edges_flat, offsets, slacks, delays): the node
+        IDs of path i, from startpoint to endpoint, are
+        paths_flat[offsets[i]:offsets[i+1]] and its edge IDs
+        edges_flat[offsets[i]-i:offsets[i+1]-i-1]
+    """
+    pool_node = [end_nodes[i] for i in range(len(end_nodes))]
+    pool_next = [-1 for _ in range(len(end_nodes))]
+    pool_edge = [-1 for _ in range(len(end_nodes))]
+    pool_delay = [0.0 for _ in range(len(end_nodes))]
+    pool_required = [end_required[i] for i in range(len(end_nodes))]
+    heap = [(end_required[i] - AT[end_nodes[i]], 0, i) for i in range(len(end_nodes))]
+    heapq.heapify(heap)
+
+    paths_flat = [0 for _ in range(0)]
+    edges_flat = [0 for _ in range(0)]
+    offsets = [0]
+    slacks = [0.0 for _ in range(0)]
+    delays = [0.0 for _ in range(0)]
+    while len(heap) > 0 and len(slacks) < k:
+        key, neg_depth, i = heapq.heappop(heap)
+        u = pool_node[i]
+        if is_start[u] or rev_indptr[u] == rev_indptr[u + 1]:
+            if pool_next[i] == -1:
+                # a lone endpoint is not a path
+                continue
+            # Complete path: walk the suffix chain from u to the endpoint
+            j = i
+            while j != -1:
+                paths_flat.append(pool_node[j])
+                if pool_next[j] != -1:
+                    edges_flat.append(pool_edge[j])
+                j = pool_next[j]
+            offsets.append(len(paths_flat))
+            slacks.append(pool_required[i] - (AT[u] + pool_delay[i]))
+            delays.append(pool_delay[i])
+            continue
+
+        # Extend the suffix by each fanin edge
+        at_u = AT[u]
+        for r in range(rev_indptr[u], rev_indptr[u + 1]):
+            p = rev_src[r]
+            at_p = AT[p]
+            if at_p == -np.inf:
+                # no startpoint reaches p
+                continue
+            d = rev_delay[r]
+            pool_node.append(p)
+            pool_next.append(i)
+            pool_edge.append(rev_edges[r])
+            pool_delay.append(pool_delay[i] + d)
+            pool_required.append(pool_required[i])
+            heapq.heappush(heap, (key + (at_u - (at_p + d)), neg_depth - 1, len(pool_node) - 1))
+
+    return paths_flat, edges_flat, offsets, slacks, delays
+
+
+def find_k_worst_paths(
+    G: nx.DiGraph,
+    startpoints: Iterable[Hashable],
+    endpoints: Iterable[Hashable],
+    Tclk: float,
+    *,
+    setup: float = 0.0,
+    clock_to_q: float = 0.0,
+    startpoint_overrides: Optional[Dict[Hashable, float]] = None,
+    endpoint_overrides: Optional[Dict[Hashable, float]] = None,
+    delay_attr: str = "delay",
+    eps: float = 1e-12,
+    k: int = 1,
+):
+    """
+    Extract the k globally worst startpoint -> endpoint paths from one STA run.
+
+    Unlike find_k_critical_paths, the paths may share edges: this is the
+    classic k-worst-paths report, e.g. the k worst paths can all end at the
+    same endpoint. STA runs once and the paths are enumerated by a best-first
+    search backwards from the endpoints. Extending a partial path (suffix)
+    from node u over the fanin edge p -> u costs the deviation
+    AT[u] - (AT[p] + d(p,u)) >= 0, so the key of a suffix, the endpoint slack
+    plus its deviations, is exactly the slack of its worst completion.
+    Critical edges deviate by exactly 0, so with ties broken towards deeper
+    suffixes the search dives straight to a startpoint; completed paths pop
+    in order of increasing slack and every popped path is distinct.
+
+    Returns:
+        List of path dicts like extract_single_critical_path (plus "slack",
+        the path slack), worst first; shorter than k if fewer paths exist.
+    """
+    arrays = _run_sta_arrays(
+        G, startpoints, endpoints, Tclk, setup, clock_to_q,
+        startpoint_overrides, endpoint_overrides, delay_attr, eps,
+    )
+    res = _sta_result(arrays)
+    node_list, indptr, indices, node_index = arrays["csr"]
+    AT_arr = arrays["AT"]
+
+    # Fan-in CSR, each fan-in in node ID order
+    n = len(node_list)
+    rev_indptr, rev_edges, rev_src = fanin_csr(indptr, indices, np.arange(n))
+    is_start = _node_mask(startpoints, node_index, n)
+
+    end_nodes = []
+    end_required = []
+    # An endpoint listed twice would seed the search twice and report each
+    # of its paths twice
+    for e in dict.fromkeys(endpoints):
+        if e in node_index and np.isfinite(AT_arr[node_index[e]]):
+            end_nodes.append(node_index[e])
+            required = Tclk - setup
+            if endpoint_overrides and e in endpoint_overrides:
+                required = float(endpoint_overrides[e])
+            end_required.append(required)
+    if not end_nodes or k <= 0:
+        return []
+
+    args = (
+        rev_indptr, rev_src, rev_edges, arrays["delays"][rev_edges], AT_arr, is_start,
+        np.array(end_nodes, dtype=np.int32), np.array(end_required, dtype=np.float64),
+    )
+    if not HAVE_NUMBA:
+        # Interpreted, the search is faster over lists than over NumPy scalars
+        args = tuple(a.tolist() for a in args)
+    paths_flat, edges_flat, offsets, slacks, path_delays = _k_worst_paths_csr(*args, k)
+    paths_flat = np.asarray(paths_flat, dtype=np.int64)
+    edges_flat = np.asarray(edges_flat, dtype=np.int64)
+
+    worst_paths = []
+    for i in range(len(slacks)):
+        ids = paths_flat[offsets[i]:offsets[i + 1]]
+        path_nodes = [node_list[u] for u in ids.tolist()]
+        path_edges = list(zip(path_nodes, path_nodes[1:]))
+        # Path-restricted WNS/TNS from the slack arrays; TNS sums node then
+        # edge slacks in path order, as extract_single_critical_path does
+        all_slacks = np.concatenate((
+            arrays["node_slack"][ids],
+            arrays["edge_slack"][edges_flat[offsets[i] - i:offsets[i + 1] - i - 1]],
+        ))
+        worst_paths.append({
+            "nodes": path_nodes,
+            "edges": path_edges,
+            "delay": path_delays[i],
+            "slack": slacks[i],
+            "WNS": float(all_slacks.min()),
+            "TNS": sum(all_slacks[all_slacks < 0.0].tolist()),
+            "sta": res,
+        })
+
+    return worst_paths
+
+def layered_layout(G: nx.DiGraph, topo=None, csr=None):
+    """
+    Layered (left-to-right) positions for a timing DAG in O(V+E).
+
+    Nodes are placed in columns by topological level (longest distance in
+    edges from a source), like nx.multipartite_layout with the level as the
+    subset, so every edge points to the right. Within a column nodes are
+    stacked in node order and centered.
+
+    Args:
+        G: timing graph (a DAG)
+        topo: optional topological order of G (e.g. run_sta(...)["topo"]), as
+              labels or as an int array of CSR node IDs
+        csr: optional prebuilt `build_csr(G)` tuple to reuse
+
+    Returns:
+        dict node -> (x, y), with x in [0, 1] and y in [-1, 1]
+    """
+    node_list, indptr, indices, node_index = csr if csr is not None else build_csr(G)
+    if topo is None:
+        topo = Khan_topological_sort(G, csr=(node_list, indptr, indices, node_index), as_array=True)
+    topo_ids = topo_node_ids(topo, node_index)
+    level = topo_levels(indptr, indices, topo_ids)
+    level_nodes, level_starts = level_buckets(level)
+
+    # Rank of every node within its level, centered around 0
+    counts = np.diff(level_starts)
+    rank = np.empty(len(node_list), dtype=np.float64)
+    rank[level_nodes] = np.arange(len(node_list)) - np.repeat(level_starts[:-1], counts)
+    y = rank - (counts[level] - 1) / 2.0 if len(node_list) else rank
+
+    x = level / max(int(level.max()) if len(node_list) else 0, 1)
+    y = y / max((int(counts.max()) - 1) / 2.0 if counts.size else 0.0, 1.0)
+    return dict(zip(node_list, zip(x.tolist(), y.tolist())))
+
+
+def draw_critical_paths(G: nx.DiGraph, critical_paths, pos, ax=None):
+    """
+    Draw the timing graph with its critical paths highlighted.
+
+    The whole graph and all paths are drawn with one collection each (grey
+    background edges and nodes, path edges with per-segment colors, their
+    arrow heads and the path nodes), so the number of draw calls does not
+    grow with |E| or with the number of paths.
+
+    Args:
+        G: timing graph
+        critical_paths: path dicts as returned by find_k_critical_paths,
+                        most critical first
+        pos: dict node -> (x, y)
+        ax: matplotlib axes to draw into (default: current axes)
+
+    Returns:
+        The axes drawn into
+    """
+    if ax is None:
+        ax = plt.gca()
+
+    nodes = list(G.nodes())
+    node_index = {n: i for i, n in enumerate(nodes)}
+    xy = np.array([pos[n] for n in nodes], dtype=float).reshape(-1, 2)
+
+    def segments(edges):
+        idx = np.array([(node_index[u], node_index[v]) for u, v in edges], dtype=np.int64)
+        return xy[idx.reshape(-1, 2)]
+
+    # Background: every edge and node in light grey
+    ax.add_collection(
+        LineCollection(segments(G.edges()), colors="#e5e5e5", alpha=0.15, linewidths=1.0, zorder=1)
+    )
+    ax.scatter(xy[:, 0], xy[:, 1], s=30, c="lightgray", zorder=2)
+
+    num_paths = len(critical_paths)
+    if num_paths:
+        # Map path index to color in the spectrum (0.0 = red, 0.17 = yellow,
+        # 0.33 = green, 0.5 = cyan, 0.67 = blue, 0.83 = purple). A single path
+        # is red; otherwise path i gets (1 - i/(n-1)) * 0.8, using 0.8 to
+        # avoid wrapping back to red.
+        colormap = plt.get_cmap("hsv")
+        if num_paths == 1:
+            color_values = np.zeros(1)
+        else:
+            color_values = (1.0 - np.arange(num_paths) / (num_paths - 1)) * 0.8
+        path_colors = colormap(color_values)
+
+        # Paths are stacked from the least to the most critical, so the most
+        # critical ends up on top where paths share edges or nodes
+        order = range(num_paths - 1, -1, -1)
+        path_edges = [e for i in order for e in critical_paths[i]["edges"]]
+        edge_colors = np.repeat(
+            path_colors[num_paths - 1::-1],
+            [len(critical_paths[i]["edges"]) for i in order],
+            axis=0,
+        )
+        path_nodes = [node_index[n] for i in order for n in critical_paths[i]["nodes"]]
+        node_colors = np.repeat(
+            path_colors[num_paths - 1::-1],
+            [len(critical_paths[i]["nodes"]) for i in order],
+            axis=0,
         )
-        if not path_info:
-            break
-
-        critical_paths.append(path_info)
 
-        # Block this path for the next iteration by removing its edges
-        for (u, v) in path_info["edges"]:
-            if work_graph.has_edge(u, v):
-                work_graph.remove_edge(u, v)
+        if path_edges:
+            path_segments = segments(path_edges)
+            ax.add_collection(
+                LineCollection(path_segments, colors=edge_colors, linewidths=2, zorder=3)
+            )
+            ax.add_collection(
+                PolyCollection(
+                    _arrow_heads(path_segments, xy, 50),
+                    facecolors=edge_colors,
+                    edgecolors="none",
+                    zorder=3,
+                )
+            )
+        ax.scatter(xy[path_nodes, 0], xy[path_nodes, 1], s=50, c=node_colors, zorder=4)
 
-    return critical_paths
+    ax.autoscale_view()
+    ax.tick_params(
+        axis="both", which="both",
+        bottom=False, left=False, labelbottom=False, labelleft=False,
+    )
+    return ax
 
-if __name__ == "__main__":
-    # Main entry point: Build DAG from Verilog and run STA analysis
+def main(
+    k: int = k,
+    netlist: str = "Test_circuit_priority.v",
+    Tclk: float = 3.0,
+    setup: float = 0.05,
+    clock_to_q: float = 0.06,
+    animate: bool = False,
+):
+    """
+    Build the timing DAG of a Verilog netlist, run STA, report and plot the
+    k worst critical paths and optionally animate Khan's algorithm.
+
+    Args:
+        k: number of critical paths to find
+        netlist: path of the Verilog netlist; a bare file name is looked up
+                 in the benches directory
+        Tclk: clock period (ns)
+        setup: setup time (ns)
+        clock_to_q: clock-to-Q delay of the startpoints (ns)
+        animate: also animate Khan's algorithm on the DAG
+    """
+    # Load Verilog netlist and build timing DAG
     script_dir = os.path.dirname(os.path.abspath(__file__))
     project_root = os.path.dirname(script_dir)
-    
-    # Add project root to path for imports when running as script
-    if project_root not in sys.path:
-        sys.path.insert(0, project_root)
-    
-    # Try relative import first, fall back to absolute
-    try:
-        from .verilog_parcer import build_graph_from_verilog
-    except ImportError:
-        try:
-            from verilog_parcer import build_graph_from_verilog
-        except ImportError:
-            from sta.verilog_parcer import build_graph_from_verilog
-
-    # Load Verilog netlist and build timing DAG
-    netlist_path = os.path.join(project_root, "benches", "Test_circuit_priority.v")
+    netlist_path = netlist
+    if not os.path.dirname(netlist_path):
+        netlist_path = os.path.join(project_root, "benches", netlist)
     G, startpoints, endpoints = build_graph_from_verilog(netlist_path)
 
-    delays = [G[u][v]["delay"] for u, v in G.edges()]
-    unique_delays = sorted(set(delays))
-    delay_counts = {d: delays.count(d) for d in unique_delays}
+    delays = [d for _, _, d in G.edges(data="delay")]
+    # One counting pass instead of a delays.count() scan per unique delay
+    delay_counts = Counter(delays)
+    unique_delays = sorted(delay_counts)
     
     print("Min edge delay:", min(delays))
     print("Max edge delay:", max(delays))
     print("Number of edges with nonzero delay:", sum(1 for d in delays if d != 0.0))
     print(f"Unique delays found: {len(unique_delays)}")
     print("Delay distribution:")
-    for delay in sorted(delay_counts.keys()):
+    for delay in unique_delays:
         count = delay_counts[delay]
         pct = 100 * count / len(delays) if delays else 0
         print(f"  {delay:.3f} ns: {count:5d} edges ({pct:.1f}%)")
@@ -243,11 +800,6 @@ if __name__ == "__main__":
     print(f"Loaded DAG from {netlist_path}")
     print(f"Nodes: {len(G.nodes())}, Edges: {len(G.edges())}")
 
-    # Timing parameters
-    Tclk = 3
-    setup = 0.05
-    clock_to_q = 0.06
-
     # Run STA analysis
     sta_res = run_sta(
         G,
@@ -272,6 +824,7 @@ if __name__ == "__main__":
         clock_to_q=clock_to_q,
         delay_attr="delay",
         k=k,
+        topo=sta_res["topo"],
     )
     elapsed_time = time.time() - start_time
     print(f"Critical path calculation took {elapsed_time:.4f} seconds ({elapsed_time*1000:.2f} ms)")
@@ -292,55 +845,52 @@ if __name__ == "__main__":
 
     # Visualize the timing graph with critical paths highlighted
     if critical_paths:
-        pos = nx.spring_layout(G, seed=42)
-
-        nx.draw_networkx_nodes(G, pos, node_size=30, node_color="lightgray")
-        nx.draw_networkx_edges(
-            G, pos, arrows=True, arrowsize=5, edge_color="#e5e5e5", alpha=0.15
-        )
-
-        num_paths = len(critical_paths)
-        # Use a colormap that spans the full spectrum (red → yellow → green → blue → purple)
-        colormap = plt.cm.get_cmap('hsv')
-        
-        for i in range(num_paths - 1, -1, -1):
-            path_info = critical_paths[i]
-            path_nodes = path_info["nodes"]
-            path_edges = path_info["edges"]
-
-            # Map path index to color in the spectrum
-            # Most critical path (i=num_paths-1) gets red, least critical gets purple/blue
-            if num_paths == 1:
-                color_value = 0.0  # Red for single path
-            else:
-                # Distribute colors across the spectrum (0.0 = red, 0.17 = yellow, 0.33 = green, 0.5 = cyan, 0.67 = blue, 0.83 = purple)
-                # Reverse the mapping: most critical (high i) → red (0.0), least critical (low i) → purple (0.8)
-                color_value = (1.0 - i / (num_paths - 1)) * 0.8  # Use 0.8 to avoid wrapping back to red
-            
-            color = colormap(color_value)
-
-            nx.draw_networkx_nodes(
-                G, pos, nodelist=path_nodes, node_size=50, node_color=color
-            )
-            nx.draw_networkx_edges(
-                G,
-                pos,
-                edgelist=path_edges,
-                arrows=True,
-                arrowsize=5,
-                edge_color=color,
-                width=2,
-            )
-
+        # Layered by topological level: linear time, and the signal flow
+        # reads left to right (spring_layout is O(V^2) per iteration)
+        pos = layered_layout(G, topo=sta_res["topo"])
+        draw_critical_paths(G, critical_paths, pos)
         plt.title(f"Timing DAG with {len(critical_paths)} Critical Path(s)")
-        plt.show()
-
-    # # Khan's algorithm animation
-    # order_plain = Khan_topological_sort(G)
-    # order_states, _ = Khan_with_states(G)
+        if HEADLESS:
+            out_path = os.path.join(project_root, "critical_paths.png")
+            plt.savefig(out_path, dpi=300, bbox_inches="tight")
+            print(f"\nSaved plot to {out_path}")
+        else:
+            plt.show()
+
+    if animate:
+        # Khan's algorithm animation
+        order_states, _ = Khan_with_states(G)
+        print("\nTopological order length (Khan_topological_sort):", len(sta_res["topo"]))
+        print("Topological order length (states):", len(order_states))
+        if HEADLESS:
+            out_path = os.path.join(project_root, "khan_animation.gif")
+            # One PNG per rendered state is held in memory until the GIF
+            # is written, so stride large graphs down to a bounded count
+            animate_khan(G, interval=100, save_path=out_path, max_frames=500)
+            print(f"Saved animation to {out_path}")
+        else:
+            animate_khan(G, interval=100)
 
-    # print("\nTopological order length (Khan_topological_sort):", len(order_plain))
-    # print("Topological order length (states):", len(order_states))
 
-    # # Animate Khan's algorithm
-    # animate_khan(G, interval=20)
+if __name__ == "__main__":
+    # Main entry point: Build DAG from Verilog and run STA analysis
+    parser = argparse.ArgumentParser(
+        description="Static timing analysis and k worst critical paths of a Verilog netlist."
+    )
+    parser.add_argument("netlist", nargs="?", default="Test_circuit_priority.v",
+                        help="Verilog netlist (a bare file name is looked up in benches/)")
+    parser.add_argument("-k", type=int, default=k, help="number of critical paths")
+    parser.add_argument("--tclk", type=float, default=3.0, help="clock period (ns)")
+    parser.add_argument("--setup", type=float, default=0.05, help="setup time (ns)")
+    parser.add_argument("--clock-to-q", type=float, default=0.06, help="clock-to-Q delay (ns)")
+    parser.add_argument("--animate", action="store_true",
+                        help="also animate Khan's algorithm on the DAG")
+    args = parser.parse_args()
+    main(
+        k=args.k,
+        netlist=args.netlist,
+        Tclk=args.tclk,
+        setup=args.setup,
+        clock_to_q=args.clock_to_q,
+        animate=args.animate,
+    )
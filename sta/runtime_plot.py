@@ -3,6 +3,16 @@ import sys
 import time
 from typing import List, Dict
 
+import matplotlib
+
+# No display (headless server/CI): skip the GUI backend's startup, the plot
+# is saved to a file anyway. Must be chosen before pyplot is imported.
+HEADLESS = sys.platform.startswith("linux") and not (
+    os.environ.get("DISPLAY") or os.environ.get("WAYLAND_DISPLAY")
+)
+if HEADLESS:
+    matplotlib.use("Agg")
+
 import matplotlib.pyplot as plt
 
 # Handle imports for both module and direct script execution
@@ -14,19 +24,19 @@ if __name__ == "__main__" or not __package__:
 # Import STA utilities
 try:
     # When used as a module inside the sta package
-    from .run_sta import find_k_critical_paths
+    from .run_sta import iter_k_critical_paths
 except ImportError:
     # When run directly as a script
-    from run_sta import find_k_critical_paths
+    from run_sta import iter_k_critical_paths
 
 # Import Verilog parser
 try:
-    from .verilog_parcer import build_graph_from_verilog
+    from .Verilog_Parcer import build_graph_from_verilog
 except ImportError:
     try:
-        from verilog_parcer import build_graph_from_verilog
+        from Verilog_Parcer import build_graph_from_verilog
     except ImportError:
-        from sta.verilog_parcer import build_graph_from_verilog
+        from sta.Verilog_Parcer import build_graph_from_verilog
 
 
 # Values of k to test
@@ -58,6 +68,11 @@ def measure_runtime_for_circuit(
     For a given Verilog netlist, measure runtime of find_k_critical_paths
     for different values of k.
 
+    The first k paths do not depend on k, so the paths are generated once
+    up to the largest k and the runtime of each k is the time elapsed when
+    its k-th path is ready (or when the paths run out, where
+    find_k_critical_paths would stop as well).
+
     Returns a dict: k -> runtime_seconds.
     """
     G, startpoints, endpoints = build_graph_from_verilog(netlist_path)
@@ -67,21 +82,33 @@ def measure_runtime_for_circuit(
     print(f"\n=== {os.path.basename(netlist_path)} ===")
     print(f"Nodes: {len(G.nodes())}, Edges: {len(G.edges())}")
 
-    for k in k_values:
-        start = time.perf_counter()
-        _ = find_k_critical_paths(
-            G,
-            startpoints=startpoints,
-            endpoints=endpoints,
-            Tclk=Tclk,
-            setup=setup,
-            clock_to_q=clock_to_q,
-            delay_attr="delay",
-            k=k,
-        )
-        elapsed = time.perf_counter() - start
+    pending = sorted(set(k_values))
+    start = time.perf_counter()
+    found = 0
+    paths = iter_k_critical_paths(
+        G,
+        startpoints=startpoints,
+        endpoints=endpoints,
+        Tclk=Tclk,
+        setup=setup,
+        clock_to_q=clock_to_q,
+        delay_attr="delay",
+        k=pending[-1] if pending else 0,
+    )
+    while True:
+        # Every k the paths found so far reach is done
+        while pending and pending[0] <= found:
+            runtimes[pending.pop(0)] = time.perf_counter() - start
+        if not pending or next(paths, None) is None:
+            break
+        found += 1
+    # Fewer paths than the remaining k: find_k_critical_paths stops here too
+    elapsed = time.perf_counter() - start
+    for k in pending:
         runtimes[k] = elapsed
-        print(f"k = {k:3d}: {elapsed:.6f} s")
+
+    for k in sorted(runtimes):
+        print(f"k = {k:3d}: {runtimes[k]:.6f} s")
 
     return runtimes
 
@@ -132,7 +159,8 @@ def main():
     plt.savefig(out_path, dpi=300, bbox_inches="tight")
     print(f"\nSaved plot to {out_path}")
 
-    plt.show()
+    if not HEADLESS:
+        plt.show()
 
 
 if __name__ == "__main__":
@@ -1,42 +1,111 @@
 # slack_computation.py
 import math
 import networkx as nx
-from typing import Dict, Hashable, Tuple
+import numpy as np
+from typing import Dict, Hashable, List, Optional, Tuple, Union
+
+try:
+    from .graph_csr import build_csr, edge_delays
+except ImportError:
+    from graph_csr import build_csr, edge_delays
+
 
 def compute_slacks(
     G: nx.DiGraph,
-    AT: Dict[Hashable, float],
-    RT: Dict[Hashable, float],
+    AT: Union[Dict[Hashable, float], np.ndarray],
+    RT: Union[Dict[Hashable, float], np.ndarray],
     delay_attr: str = "delay",
-) -> Tuple[Dict[Hashable, float], Dict[tuple, float], float, float]:
+    csr=None,
+    delays: Optional[np.ndarray] = None,
+    as_array: bool = False,
+) -> Tuple[Union[Dict[Hashable, float], np.ndarray], Union[Dict[tuple, float], np.ndarray],
+           float, float]:
     """
     Compute node and edge slacks, plus WNS and TNS.
 
     Node slack: S[n] = RT[n] - AT[n]
     Edge slack: S[(u,v)] = RT[v] - AT[u] - d(u,v)
 
+    Both are evaluated as vectorized expressions over the CSR node/edge
+    arrays; nodes missing from AT/RT count as -inf/+inf.
+
+    Args:
+        G: timing graph
+        AT, RT: dicts node -> arrival/required time, or float arrays indexed
+                by the CSR node IDs (e.g. from the as_array sweeps)
+        delay_attr: edge attribute name carrying arc delay
+        csr: optional prebuilt `build_csr(G)` tuple to reuse
+        delays: optional prebuilt `edge_delays(G, node_list, delay_attr)`
+                array aligned with the CSR
+        as_array: return the node/edge slacks as float64 arrays over the CSR
+                  node/edge IDs instead of dicts; building the label-keyed
+                  dicts costs more than computing the slacks
+
     Returns:
         node_slack, edge_slack, WNS, TNS
     """
-    # Node slacks
-    node_slack: Dict[Hashable, float] = {}
-    for n in G.nodes():
-        at = AT.get(n, -math.inf)
-        rt = RT.get(n, math.inf)
-        s = rt - at
-        node_slack[n] = s
-
-    # Edge slacks
-    edge_slack: Dict[tuple, float] = {}
-    for u, v, data in G.edges(data=True):
-        d = float(data.get(delay_attr, 0.0))
-        at_u = AT.get(u, -math.inf)
-        rt_v = RT.get(v, math.inf)
-        edge_slack[(u, v)] = rt_v - at_u - d
-
-    # WNS/TNS over *finite* slacks only (ignore ±inf islands)
-    finite_node_slacks = [s for s in node_slack.values() if math.isfinite(s)]
-    WNS = min(finite_node_slacks) if finite_node_slacks else math.inf
-    TNS = sum(s for s in finite_node_slacks if s < 0.0)
+    node_list, indptr, indices, _ = csr if csr is not None else build_csr(G)
+    if delays is None:
+        delays = edge_delays(G, node_list, delay_attr)
+    AT_arr = _node_array(AT, node_list, -math.inf)
+    RT_arr = _node_array(RT, node_list, math.inf)
+
+    src = np.repeat(np.arange(len(node_list), dtype=np.int32), np.diff(indptr))
+    node_slack_arr = RT_arr - AT_arr
+    edge_slack_arr = RT_arr[indices] - AT_arr[src] - delays
+    if as_array:
+        return (node_slack_arr, edge_slack_arr) + _worst_and_total_slack(node_slack_arr)
+    return slacks_from_arrays(node_list, indptr, indices, node_slack_arr, edge_slack_arr)
+
+
+def _node_array(values, node_list: List[Hashable], default: float) -> np.ndarray:
+    """float64 array over the node IDs from a node -> value dict (or array)."""
+    if isinstance(values, np.ndarray):
+        return values.astype(np.float64, copy=False)
+    get = values.get
+    return np.fromiter(
+        (get(n, default) for n in node_list), dtype=np.float64, count=len(node_list)
+    )
+
+
+def slacks_from_arrays(
+    node_list: List[Hashable],
+    indptr: np.ndarray,
+    indices: np.ndarray,
+    node_slack_arr: np.ndarray,
+    edge_slack_arr: np.ndarray,
+) -> Tuple[Dict[Hashable, float], Dict[tuple, float], float, float]:
+    """
+    compute_slacks() results from slack arrays over a CSR graph, e.g. from
+    backward_required_times_and_slacks().
+
+    Args:
+        node_list, indptr, indices: the `build_csr(G)` arrays the slacks are
+                                    indexed by
+        node_slack_arr: slack per node ID
+        edge_slack_arr: slack per edge ID (aligned with `indices`)
+
+    Returns:
+        node_slack, edge_slack, WNS, TNS (as compute_slacks)
+    """
+    node_slack: Dict[Hashable, float] = dict(zip(node_list, node_slack_arr.tolist()))
+    src = np.repeat(np.arange(len(node_list), dtype=np.int32), np.diff(indptr))
+    edge_slack: Dict[tuple, float] = dict(zip(
+        zip([node_list[u] for u in src.tolist()], [node_list[v] for v in indices.tolist()]),
+        edge_slack_arr.tolist(),
+    ))
 
+    WNS, TNS = _worst_and_total_slack(node_slack_arr)
     return node_slack, edge_slack, WNS, TNS
+
+
+def _worst_and_total_slack(node_slack_arr: np.ndarray) -> Tuple[float, float]:
+    """
+    WNS/TNS over *finite* slacks only (ignore ±inf islands). TNS is a Python
+    sum in node order, so the totals agree to the last bit with a loop over
+    the node slack dict.
+    """
+    finite = node_slack_arr[np.isfinite(node_slack_arr)]
+    WNS = float(finite.min()) if finite.size else math.inf
+    TNS = sum(finite[finite < 0.0].tolist())
+    return WNS, TNS
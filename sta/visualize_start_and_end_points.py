@@ -15,10 +15,74 @@ This will:
   to make path clusters visually clearer.
 """
 
-from typing import Iterable, Hashable, Dict, List, Optional, Any
+import weakref
+from typing import Iterable, Hashable, Dict, List, Optional, Any, Sequence, Tuple
 
 import matplotlib.pyplot as plt
+from matplotlib.collections import LineCollection, PolyCollection
 import networkx as nx
+import numpy as np
+
+try:
+    from .animate_khan import _arrow_heads
+    from .graph_csr import build_csr, topo_levels
+    from .Khan import Khan_topological_sort
+except ImportError:
+    from animate_khan import _arrow_heads
+    from graph_csr import build_csr, topo_levels
+    from Khan import Khan_topological_sort
+
+
+# G -> {(#nodes, #edges, startpoints): _cached_levels result}, so redrawing
+# the same graph (other paths, titles) skips the level sweep. Weakly keyed on
+# the graph itself: an entry dies with its graph and can never be handed to
+# another graph that reuses its id.
+_levels_cache: "weakref.WeakKeyDictionary[nx.DiGraph, Dict[tuple, tuple]]" = (
+    weakref.WeakKeyDictionary()
+)
+# Startpoint sets kept per graph
+_LEVELS_CACHE_SIZE = 8
+
+
+def clear_levels_cache() -> None:
+    """
+    Drop the cached node levels. Needed after changing a graph's edges in
+    a way that keeps its node and edge counts (the cache key).
+    """
+    _levels_cache.clear()
+
+
+def _level_array(G: nx.DiGraph, startpoints: Iterable[Hashable]):
+    """
+    Levels of _compute_levels as an array over the `build_csr(G)` node IDs.
+
+    Returns:
+        Tuple of (csr, int32 level array)
+    """
+    csr = build_csr(G)
+    node_list, indptr, indices, node_index = csr
+    n = len(node_list)
+    if indices.size == 0:
+        # No edges: every node is a source at level 0, nothing to sort
+        return csr, np.zeros(n, dtype=np.int32)
+
+    # Use a topological order so predecessors are visited before successors
+    try:
+        topo = Khan_topological_sort(G, csr=csr, as_array=True)
+    except nx.NetworkXUnfeasible:
+        # Graph has cycles; fall back to arbitrary ordering
+        topo = np.arange(n, dtype=np.int32)
+
+    # Startpoints stay at level 0: drop their fan-in edges and take the
+    # longest distance (in edges) from a source of what is left. The order
+    # of G stays topological for the pruned graph.
+    is_start = np.zeros(n, dtype=np.bool_)
+    is_start[[node_index[u] for u in startpoints if u in node_index]] = True
+    keep = ~is_start[indices]
+    src = np.repeat(np.arange(n, dtype=np.int32), np.diff(indptr))
+    kept_indptr = np.zeros(n + 1, dtype=np.int32)
+    np.cumsum(np.bincount(src[keep], minlength=n), out=kept_indptr[1:])
+    return csr, topo_levels(kept_indptr, indices[keep], topo)
 
 
 def _compute_levels(G: nx.DiGraph, startpoints: Iterable[Hashable]) -> Dict[Hashable, int]:
@@ -30,87 +94,77 @@ def _compute_levels(G: nx.DiGraph, startpoints: Iterable[Hashable]) -> Dict[Hash
     Returns:
         level dict mapping node -> non-negative integer.
     """
-    start_set = set(startpoints)
-    # Default all nodes to level 0
-    level: Dict[Hashable, int] = {n: 0 for n in G.nodes()}
+    csr, lvl = _level_array(G, startpoints)
+    return dict(zip(csr[0], lvl.tolist()))
 
-    # Use a topological order so predecessors are visited before successors
-    try:
-        topo = list(nx.topological_sort(G))
-    except nx.NetworkXUnfeasible:
-        # Graph has cycles; fall back to arbitrary ordering
-        topo = list(G.nodes())
 
-    for n in topo:
-        if n in start_set or G.in_degree(n) == 0:
-            # treat as a source
-            level[n] = 0
-        else:
-            preds = list(G.predecessors(n))
-            if preds:
-                level[n] = max(level[p] + 1 for p in preds)
-            else:
-                level[n] = 0
+def _cached_levels(
+    G: nx.DiGraph, start_set: frozenset
+) -> Tuple[List[Hashable], Dict[Hashable, int], np.ndarray, int]:
+    """
+    _compute_levels as an array over a dense node indexing, cached per graph
+    and startpoints.
 
-    return level
+    Returns:
+        Tuple of (nodes in G order, node -> index, level array over the
+        indices, largest level)
+    """
+    graph_cache = _levels_cache.setdefault(G, {})
+    key = (G.number_of_nodes(), G.number_of_edges(), start_set)
+    cached = graph_cache.get(key)
+    if cached is None:
+        (nodes, _, _, node_index), lvl = _level_array(G, start_set)
+        cached = (nodes, node_index, lvl, int(lvl.max()) if lvl.size else 0)
+        if len(graph_cache) >= _LEVELS_CACHE_SIZE:
+            # Evict the oldest entry
+            del graph_cache[next(iter(graph_cache))]
+        graph_cache[key] = cached
+    return cached
 
 
 def _build_positions(
     G: nx.DiGraph,
-    startpoints: Iterable[Hashable],
-    endpoints: Iterable[Hashable],
-    critical_paths: Optional[List[Dict[str, Any]]] = None,
+    start_set: frozenset,
+    path_nodes: Sequence[Sequence[Hashable]] = (),
 ) -> Dict[Hashable, tuple]:
     """
     Build a 2D position dictionary for nodes so that:
 
     - X axis = "time"/logic level from left (sources) to right (sinks).
     - Y axis = used to separate different critical paths into clusters.
-    """
-    start_set = set(startpoints)
-    end_set = set(endpoints)
 
-    levels = _compute_levels(G, startpoints)
-    if not levels:
+    start_set: frozenset of the startpoints (also part of the level cache key).
+    path_nodes: the node sequence of every critical path, most critical first.
+    """
+    # Levels and first path index of every node as arrays over dense indices
+    nodes, node_idx, lvl, max_level = _cached_levels(G, start_set)
+    if not nodes:
         return {}
 
     # Normalize x-coordinates so they span [0, 1]
-    max_level = max(levels.values()) or 1
-    x_scale = 1.0 / max_level
+    x_scale = 1.0 / (max_level or 1)
 
-    # If we have critical paths, build a mapping node -> list of path indices
-    node_to_paths: Dict[Hashable, List[int]] = {}
-    if critical_paths:
-        for pi, path in enumerate(critical_paths):
-            for n in path.get("nodes", []):
-                node_to_paths.setdefault(n, []).append(pi)
+    # Index of the first critical path each node belongs to (-1 if none)
+    path_idx = np.full(len(nodes), -1, dtype=np.int64)
+    for pi in range(len(path_nodes) - 1, -1, -1):
+        ids = [node_idx[n] for n in path_nodes[pi] if n in node_idx]
+        path_idx[ids] = pi
 
     # Y coordinates:
     # - If node belongs to at least one critical path, place it in a band for that path.
     # - Otherwise, place it in a "background" band near y=0.
-    positions: Dict[Hashable, tuple] = {}
-
     # Compute how many vertical bands we need
-    num_paths = len(critical_paths) if critical_paths is not None else 0
+    num_paths = len(path_nodes)
     # Reserve central band for non-path nodes
     total_bands = max(num_paths, 1) + 1
 
-    for n in G.nodes():
-        x = levels.get(n, 0) * x_scale
+    xs = lvl * x_scale
+    # bands are spread in (0, 1]; band 0 is reserved for non-critical
+    band_y_center = np.where(path_idx >= 0, (path_idx + 1) / total_bands, 0.0)
+    # small jitter based on level to avoid perfect straight lines
+    ys = band_y_center + 0.02 * ((lvl % 5) - 2)
 
-        if n in node_to_paths and num_paths > 0:
-            # Place according to the first path it participates in
-            pidx = node_to_paths[n][0]
-            # bands are spread in (0, 1]; band 0 is reserved for non-critical
-            band_y_center = (pidx + 1) / (total_bands)
-            # small jitter based on level to avoid perfect straight lines
-            y = band_y_center + 0.02 * ((levels[n] % 5) - 2)
-        else:
-            # background band near bottom
-            band_y_center = 0.0
-            y = band_y_center + 0.02 * ((levels[n] % 5) - 2)
-
-        positions[n] = (x, y)
+    positions: Dict[Hashable, tuple] = dict(zip(nodes, zip(xs.tolist(), ys.tolist())))
 
     return positions
 
@@ -123,6 +177,9 @@ def visualize_start_and_endpoints(
     figsize=(14, 6),
     title: str = "Circuit-style DAG view (startpoints → endpoints)",
     show_labels: bool = True,
+    max_edges: Optional[int] = None,
+    label_nodes: Optional[Iterable[Hashable]] = None,
+    rasterize_background: bool = False,
 ) -> None:
     """
     Visualize the DAG in a "circuit-style" left-to-right layout.
@@ -149,92 +206,143 @@ def visualize_start_and_endpoints(
             }
         figsize: matplotlib figure size.
         title: plot title.
-        show_labels: whether to draw node labels.
+        show_labels: whether to draw node labels (skipped for more than 200
+            labels).
+        max_edges: if given, draw at most this many grey background
+            (non-critical) edges, as a uniform random sample with a fixed
+            seed; the critical path edges are always drawn. None draws every
+            edge.
+        label_nodes: optional nodes to label (e.g. the critical path nodes)
+            instead of all nodes.
+        rasterize_background: rasterize the grey background edges when the
+            figure is saved to a vector format (PDF/SVG), keeping the
+            critical paths as vectors. Only pays off for exports dominated
+            by the edges; the embedded image is often larger than the
+            vector edges of small and mid-sized graphs.
     """
     if G.number_of_nodes() == 0:
         print("Graph is empty, nothing to visualize.")
         return
 
-    start_set = set(startpoints)
+    # Materialize the startpoints/endpoints once (they may be one-shot iterators)
+    start_set = frozenset(startpoints)
     end_set = set(endpoints)
 
-    pos = _build_positions(G, startpoints, endpoints, critical_paths)
+    # (nodes, edges) of every path, looked up once for the layout and drawing
+    paths = [(path.get("nodes", ()), path.get("edges", ())) for path in critical_paths or ()]
+
+    pos = _build_positions(G, start_set, [nodes for nodes, _ in paths])
+    node_xy = np.array(list(pos.values()), dtype=float)
 
     fig, ax = plt.subplots(figsize=figsize)
     ax.set_title(title)
     ax.axis("off")
-
-    # Draw all edges in light grey
-    nx.draw_networkx_edges(
-        G,
-        pos,
-        ax=ax,
-        arrows=True,
-        arrowsize=10,
-        alpha=0.2,
-        edge_color="lightgray",
+    # Every edge joins two nodes, so the node positions bound the plot: set
+    # the data limits once from them instead of from each collection
+    ax.update_datalim(node_xy)
+    ax.autoscale_view()
+
+    # The critical path edges are drawn on top in their own collection;
+    # leave them out of the background instead of blending both
+    crit_edges = frozenset(e for _, edges in paths for e in edges)
+    if crit_edges:
+        background_edges = [e for e in G.edges() if e not in crit_edges]
+    else:
+        background_edges = list(G.edges())
+    if max_edges is not None and len(background_edges) > max_edges:
+        # The non-critical edges are noise; sample them in edge order
+        keep = np.random.default_rng(0).choice(len(background_edges), max_edges, replace=False)
+        background_edges = [background_edges[i] for i in np.sort(keep).tolist()]
+
+    # Draw all edges in light grey: one LineCollection without arrowheads
+    # instead of a FancyArrowPatch per edge (the flow reads left to right)
+    ax.add_collection(
+        LineCollection(
+            [(pos[u], pos[v]) for u, v in background_edges],
+            colors="lightgray",
+            alpha=0.2,
+            linewidths=1.0,
+            zorder=1,
+            rasterized=rasterize_background,
+        ),
+        autolim=False,
     )
 
-    # Highlight critical paths if provided
-    if critical_paths:
-        # Color map per path
-        cmap = plt.cm.get_cmap("tab10")
-        for idx, path in enumerate(critical_paths):
-            color = cmap(idx % 10)
-            edges = path.get("edges", [])
-            if edges:
-                nx.draw_networkx_edges(
-                    G,
-                    pos,
-                    edgelist=edges,
-                    ax=ax,
-                    arrows=True,
-                    arrowsize=14,
-                    width=2.0,
-                    edge_color=[color],
+    # Highlight critical paths if provided: all path edges in one
+    # LineCollection (per-segment colors) plus one set of arrowheads
+    if paths:
+        # One tab10 color per path as an (n_paths, 4) RGBA array
+        path_colors = plt.get_cmap("tab10")(np.arange(len(paths)) % 10)
+        path_segments = []
+        seg_path_idx = []
+        for idx, (_, edges) in enumerate(paths):
+            for u, v in edges:
+                path_segments.append((pos[u], pos[v]))
+                seg_path_idx.append(idx)
+        if path_segments:
+            path_segments = np.array(path_segments, dtype=float)
+            path_colors = path_colors[seg_path_idx]
+            ax.add_collection(
+                LineCollection(
+                    path_segments, colors=path_colors, linewidths=2.0, alpha=0.9, zorder=1
+                ),
+                autolim=False,
+            )
+            ax.add_collection(
+                PolyCollection(
+                    _arrow_heads(path_segments, node_xy, 120),
+                    facecolors=path_colors,
+                    edgecolors="none",
                     alpha=0.9,
-                )
+                    zorder=1,
+                ),
+                autolim=False,
+            )
+
+    # Draw nodes: one scatter per class, classified with set operations.
+    # Internal nodes go first so that start/end markers stay on top.
+    nodes = G.nodes()
+    node_classes = [
+        (nodes - start_set - end_set, "#377eb8", 120),  # blue for internal nodes
+        (nodes & (start_set - end_set), "#4daf4a", 220),  # green
+        (nodes & (end_set - start_set), "#e41a1c", 220),  # red
+        (nodes & start_set & end_set, "#ffcc00", 250),  # degenerate case: both start and end
+    ]
+    for members, color, size in node_classes:
+        if not members:
+            continue
+        xy = np.array([pos[n] for n in members], dtype=float)
+        ax.scatter(
+            xy[:, 0],
+            xy[:, 1],
+            c=color,
+            s=size,
+            linewidths=0.5,
+            edgecolors="black",
+            alpha=0.9,
+            zorder=2,  # above the edges, like draw_networkx_nodes
+        )
 
-    # Prepare node colors and sizes:
-    node_colors = []
-    node_sizes = []
-
-    for n in G.nodes():
-        if n in start_set and n in end_set:
-            # degenerate case: both start and end
-            node_colors.append("#ffcc00")  # yellow
-            node_sizes.append(250)
-        elif n in start_set:
-            node_colors.append("#4daf4a")  # green
-            node_sizes.append(220)
-        elif n in end_set:
-            node_colors.append("#e41a1c")  # red
-            node_sizes.append(220)
+    # Labels: plain ax.text calls (what draw_networkx_labels does per node,
+    # without its per-call argument handling); clipped at the axes
+    if show_labels:
+        if label_nodes is None:
+            label_nodes = G.nodes()
         else:
-            node_colors.append("#377eb8")  # blue for internal nodes
-            node_sizes.append(120)
-
-    # Draw nodes
-    nx.draw_networkx_nodes(
-        G,
-        pos,
-        ax=ax,
-        node_color=node_colors,
-        node_size=node_sizes,
-        linewidths=0.5,
-        edgecolors="black",
-        alpha=0.9,
-    )
-
-    # Labels
-    if show_labels and G.number_of_nodes() <= 200:
-        nx.draw_networkx_labels(
-            G,
-            pos,
-            ax=ax,
-            font_size=6,
-            font_color="black",
-        )
+            label_nodes = [n for n in label_nodes if n in pos]
+        if len(label_nodes) <= 200:
+            for n in label_nodes:
+                x, y = pos[n]
+                ax.text(
+                    x,
+                    y,
+                    str(n),
+                    fontsize=6,
+                    color="black",
+                    ha="center",
+                    va="center",
+                    clip_on=True,
+                )
 
     # Add a simple legend-like text
     legend_y = 1.02